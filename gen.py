@@ -1,156 +1,17 @@
 import streamlit as st
 import datetime
-import itertools
-import sys
 import os
-import re
-from collections import OrderedDict
-import random
-import time # For simulating progress if needed, and for unique keys
-
-# --- Configuration (Copied and adapted from CLI) ---
-DEFAULT_OUTPUT_FILENAME_BASE = "wordlist"
-MIN_YEAR = 1900
-MAX_YEAR = datetime.datetime.now().year + 1
-NUMBERS_TO_APPEND_RANGE = (0, 99)
-COMMON_NUMBER_SEQUENCES = ["1", "12", "123", "1234", "12345", "7", "007"]
-LEET_TARGET_CHARS = 'aeiostlz'
-
-# --- Helper Functions (Copied/adapted from CLI, removed CLI-specific print/input) ---
-
-def validate_date_str(date_str):
-    """Validates YYYY-MM-DD format string."""
-    if not date_str: return True # Allow empty
-    try:
-        date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-        year = date_obj.year
-        if not MIN_YEAR <= year <= MAX_YEAR:
-             return False
-        return True
-    except (ValueError, IndexError):
-        return False
-
-def validate_year_str(year_str):
-    """Validates a 4-digit year string."""
-    if not year_str: return True # Allow empty
-    if not year_str.isdigit() or len(year_str) != 4:
-        return False
-    year = int(year_str)
-    if not MIN_YEAR <= year <= MAX_YEAR:
-        return False
-    return True
-
-def parse_list_input(text_area_content):
-    """Parses comma or newline separated input from text_area."""
-    if not text_area_content:
-        return []
-    # Split by comma or newline, strip whitespace, filter empty strings
-    items = re.split(r'[,\n]', text_area_content)
-    return [item.strip() for item in items if item.strip()]
-
-def generate_date_variations(date_obj):
-    """Generates various formats from a datetime object."""
-    if not date_obj: return []
-    # Ensure it's a datetime object for strftime, date object is fine for day/month/year
-    if isinstance(date_obj, datetime.date) and not isinstance(date_obj, datetime.datetime):
-        date_obj = datetime.datetime.combine(date_obj, datetime.datetime.min.time())
-
-    variations = set()
-    d = date_obj.day
-    m = date_obj.month
-    y = date_obj.year
-    yy = str(y)[-2:]
-
-    formats = [
-        f"{d}{m}{y}", f"{d}{m}{yy}", f"{m}{d}{y}", f"{m}{d}{yy}",
-        f"{y}{m}{d}", f"{yy}{m}{d}", f"{d:02d}{m:02d}{y}", f"{d:02d}{m:02d}{yy}",
-        f"{m:02d}{d:02d}{y}", f"{m:02d}{d:02d}{yy}", f"{y}{m:02d}{d:02d}", f"{yy}{m:02d}{d:02d}",
-        f"{d}{m}", f"{m}{d}", f"{d:02d}{m:02d}", f"{m:02d}{d:02d}",
-        f"{m}{y}", f"{m}{yy}", f"{m:02d}{y}", f"{m:02d}{yy}",
-        f"{d}{y}", f"{d}{yy}", f"{d:02d}{y}", f"{d:02d}{yy}",
-        f"{y}", f"{yy}", f"{d}", f"{m}", f"{d:02d}", f"{m:02d}"
-    ]
-    variations.update(formats)
-    try:
-        month_full = date_obj.strftime("%B").lower()
-        month_abbr = date_obj.strftime("%b").lower()
-        variations.add(f"{d}{month_full}")
-        variations.add(f"{d:02d}{month_full}")
-        variations.add(f"{month_full}{d}")
-        # ... (add all other month name variations from CLI version) ...
-        variations.add(f"{month_full}{d:02d}")
-        variations.add(f"{d}{month_abbr}")
-        variations.add(f"{d:02d}{month_abbr}")
-        variations.add(f"{month_abbr}{d}")
-        variations.add(f"{month_abbr}{d:02d}")
-        variations.add(f"{month_full}{y}")
-        variations.add(f"{month_full}{yy}")
-        variations.add(f"{month_abbr}{y}")
-        variations.add(f"{month_abbr}{yy}")
-        variations.add(f"{y}{month_full}")
-        variations.add(f"{yy}{month_full}")
-        variations.add(f"{y}{month_abbr}")
-        variations.add(f"{yy}{month_abbr}")
-    except ValueError: pass
-    return list(variations)
-
-def generate_case_variations(word):
-    if not word: return []
-    word_str = str(word)
-    return list(set([word_str.lower(), word_str.upper(), word_str.capitalize()]))
-
-def apply_leet_speak(word):
-    if not word: return []
-    word = str(word)
-    if not any(c.lower() in LEET_TARGET_CHARS for c in word): return [word]
-    leet_map = {'a': ['4', '@'], 'e': ['3'], 'i': ['1', '!', '|'], 'o': ['0'], 's': ['5', '$'], 't': ['7', '+'], 'l': ['1'], 'z': ['2']}
-    variations = {word}
-    replaceable_indices = [i for i, char in enumerate(word.lower()) if char in leet_map]
-    if not replaceable_indices: return [word]
-    max_leet_replacements = 4 # Limit complexity further for web app responsiveness
-    num_replacements_to_try = min(len(replaceable_indices), max_leet_replacements)
-    for k in range(1, num_replacements_to_try + 1):
-        for indices_to_replace in itertools.combinations(replaceable_indices, k):
-            current_replacements = [leet_map[word[index].lower()] for index in indices_to_replace]
-            for leet_combination in itertools.product(*current_replacements):
-                temp_word_list = list(word)
-                for i, index in enumerate(indices_to_replace):
-                     temp_word_list[index] = leet_combination[i]
-                variations.add("".join(temp_word_list))
-    return list(variations)
-
-def add_affixes(word, prefixes=None, suffixes=None):
-    if not word: return []
-    word_str = str(word)
-    variations = {word_str}
-    if prefixes:
-        for prefix in prefixes:
-             prefix_str = str(prefix)
-             if prefix_str: variations.add(prefix_str + word_str)
-    if suffixes:
-        for suffix in suffixes:
-            suffix_str = str(suffix)
-            if suffix_str: variations.add(word_str + suffix_str)
-    return list(variations)
-
-def combine_elements(list1, list2, separators=None):
-    combinations = set()
-    if not list1 or not list2: return []
-    separators = list(separators) if separators else [""]
-    if not separators: separators = [""]
-    for item1 in list1:
-        item1_str = str(item1).strip()
-        if not item1_str: continue
-        for item2 in list2:
-            item2_str = str(item2).strip()
-            if not item2_str: continue
-            if item1_str == item2_str and "" in separators: continue
-            for sep in separators:
-                sep_str = str(sep)
-                combinations.add(item1_str + sep_str + item2_str)
-                if item1_str != item2_str or sep_str != "":
-                    combinations.add(item2_str + sep_str + item1_str)
-    return list(combinations)
+import tempfile
+
+from wordlistgen import (
+    DEFAULT_OUTPUT_FILENAME_BASE, MIN_YEAR, MAX_YEAR,
+    NUMBERS_TO_APPEND_RANGE, COMMON_NUMBER_SEQUENCES,
+    GenerationSettings, WordlistEngine,
+    output_filename, parse_list_input, validate_year_str,
+)
+from wordlistgen.incremental import incremental_stream
+from wordlistgen.jobs import GenerationJob
+from wordlistgen.templates import SLOTS
 
 # --- Streamlit App ---
 
@@ -161,14 +22,16 @@ st.caption("Inspired by CUPP - Fill in target info to generate potential passwor
 st.caption("All info must be comma seperated (dog, cat, chicken)")
 
 # --- Initialize Session State ---
-if 'wordlist' not in st.session_state:
-    st.session_state.wordlist = None
-if 'wordlist_count' not in st.session_state:
-    st.session_state.wordlist_count = 0
-if 'generated' not in st.session_state:
-    st.session_state.generated = False
+if 'job' not in st.session_state:
+    st.session_state.job = None # Background GenerationJob; survives reruns
+if 'job_outcome' not in st.session_state:
+    st.session_state.job_outcome = {} # Filled in by the job's thread
+if 'job_dir' not in st.session_state:
+    st.session_state.job_dir = tempfile.mkdtemp(prefix="wordlistgen-")
 if 'output_filename' not in st.session_state:
      st.session_state.output_filename = f"{DEFAULT_OUTPUT_FILENAME_BASE}.txt"
+if 'profile_state' not in st.session_state:
+    st.session_state.profile_state = None # Stage results of the last run, for "only new candidates"
 
 # --- Sidebar for Global Settings ---
 with st.sidebar:
@@ -186,6 +49,13 @@ with st.sidebar:
         year_start = st.number_input("Start Year", min_value=MIN_YEAR, max_value=MAX_YEAR, value=2000)
         year_end = st.number_input("End Year", min_value=MIN_YEAR, max_value=MAX_YEAR, value=datetime.datetime.now().year)
 
+    st.subheader("Budget (Optional)")
+    rank_output = st.checkbox("Rank by likelihood", value=True, help="Most likely candidates first (plain names, then numbers and suffixes, then leetspeak) instead of stage order.")
+    max_candidates = st.number_input("Max Candidates (0 = unlimited)", min_value=0, value=0, step=100000, help="Ranked output keeps the most likely candidates. Otherwise leetspeak, special chars, common numbers and the year range are dropped in that order until the estimate fits and the rest is truncated.")
+
+    st.subheader("Refinement")
+    only_new = st.checkbox("Only new candidates since last run", value=False, help="After editing the target, generate just the words the previous run did not produce (same settings), to append to the earlier download.")
+
 
 # --- Main Input Form ---
 with st.form("wordlist_input_form"):
@@ -242,6 +112,9 @@ with st.form("wordlist_input_form"):
         important_years_str = st.text_area("Other Important Year(s) (YYYY)", help="Enter one per line or comma-separated")
         lucky_numbers_str = st.text_area("Lucky/Important Number(s)", help="Enter one per line or comma-separated")
 
+    with st.expander("🧩 Combination Templates"):
+        templates_str = st.text_area("Templates (one per line)", placeholder="{name}{keyword}{year}\n{pet:cap}{special?}{date}", help=f"Slots: {', '.join(SLOTS)}. Add :cap or :upper to change case, ? to make a slot optional.")
+
     st.divider()
 
     # --- Augmentation Options within the form ---
@@ -261,9 +134,9 @@ with st.form("wordlist_input_form"):
 
 # --- Generation Logic Execution (Outside the form) ---
 if submitted:
-    st.session_state.generated = False # Reset generation status
-    st.session_state.wordlist = None
-    st.session_state.wordlist_count = 0
+    if st.session_state.job is not None:
+        st.session_state.job.discard() # Stop and delete the previous run
+        st.session_state.job = None
 
     # --- Prepare Input Data ---
     info = {
@@ -287,214 +160,95 @@ if submitted:
     }
 
     # Determine output filename based on first name
-    if first_name:
-        sanitized_name = re.sub(r'[\\/*?:"<>| ]', '_', str(first_name).lower().strip())
-        if not sanitized_name: sanitized_name = DEFAULT_OUTPUT_FILENAME_BASE
-        st.session_state.output_filename = f"{sanitized_name}_wordlist.txt"
-    else:
-        st.session_state.output_filename = f"{DEFAULT_OUTPUT_FILENAME_BASE}.txt"
-
-    st.info(f"Starting wordlist generation for target '{first_name or 'Unknown'}'...")
-
-    # Placeholders for progress bars
-    progress_status = st.empty()
-    progress_bar_comb = st.progress(0)
-    progress_bar_suffix = st.progress(0)
-    progress_bar_leet = st.progress(0)
-
-    try: # Wrap generation in try/except
-        # --- Process Collected Data ---
-        progress_status.write("Processing base words and dates...")
-        base_words = set()
-        string_collections = [
-            [info.get('first_name')], [info.get('last_name')], info.get('nicknames', []),
-            [info.get('partner_first_name')], [info.get('partner_last_name')], info.get('partner_nicknames', []),
-            info.get('children_names', []), info.get('children_nicknames', []),
-            info.get('pet_names', []), [info.get('company_name')], [info.get('job_title')],
-            [info.get('city')], [info.get('country')], [info.get('street_name')],
-            info.get('interests', []), info.get('keywords', [])
-        ]
-
-        for collection in string_collections:
-            if collection:
-                for item in collection:
-                    if item:
-                        item_str = str(item)
-                        base_words.update(generate_case_variations(item_str))
-                        if len(item_str) > 2:
-                            base_words.add(item_str[::-1].lower())
-                            base_words.add(item_str[::-1].capitalize())
-                        base_words.add(item_str.lower())
-
-        # Process Dates
-        date_variations = set()
-        all_dates = [info.get('birth_date'), info.get('partner_birth_date'), info.get('anniversary_date')]
-        children_dates_objs = []
-        for date_str in info.get('children_birth_dates_str', []):
-             if validate_date_str(date_str):
-                  try: children_dates_objs.append(datetime.datetime.strptime(date_str, '%Y-%m-%d').date())
-                  except ValueError: pass
-        all_dates.extend(children_dates_objs)
-
-        for date_obj in all_dates:
-            if date_obj: date_variations.update(generate_date_variations(date_obj))
-
-        # Process Years
-        year_nums = set()
-        for date_obj in all_dates:
-            if date_obj:
-                year_nums.add(str(date_obj.year))
-                year_nums.add(str(date_obj.year)[-2:])
-        year_nums.update(info.get('important_years', []))
-        if years_range_enabled:
-            if year_start <= year_end:
-                for y in range(year_start, year_end + 1):
-                    year_nums.add(str(y))
-                    year_nums.add(str(y)[-2:])
-
-        # Combine Numeric Elements
-        numeric_elements = list(date_variations) + list(year_nums) + info.get('lucky_numbers', [])
-        numeric_elements = {str(n).strip() for n in numeric_elements if n}
-        core_strings = list({str(w).lower() for w in base_words if w})
-        all_numeric_affixes = list(numeric_elements)
-
-        # --- Generate Wordlist ---
-        progress_status.write("Generating combinations...")
-        final_wordlist = set()
-        final_wordlist.update(base_words)
-        final_wordlist.update(all_numeric_affixes)
-
-        # Combine core strings with numeric (simple concat)
-        combinations1 = combine_elements(core_strings, all_numeric_affixes, separators=[""])
-        final_wordlist.update(combinations1)
-        progress_bar_comb.progress(33, text="Combinations: Core + Numeric")
-
-        # Combine core strings with other core strings
-        name_parts = []
-        if info['first_name']: name_parts.append(str(info['first_name']).lower())
-        if info['last_name']: name_parts.append(str(info['last_name']).lower())
-        name_parts.extend([str(n).lower() for n in info.get('nicknames', []) if n])
-        interest_kws = []
-        interest_kws.extend([str(w).lower() for w in info.get('interests', []) if w])
-        interest_kws.extend([str(k).lower() for k in info.get('keywords', []) if k])
-
-        word_word_separators = ["", "_", "."]
-        if use_special_chars_opt and unique_special_chars:
-            word_word_separators.extend(unique_special_chars)
-
-        if name_parts and interest_kws:
-            combinations2 = combine_elements(name_parts, interest_kws, separators=word_word_separators)
-            final_wordlist.update(combinations2)
-        progress_bar_comb.progress(66, text="Combinations: Names + Interests")
-
-        if info['first_name'] and info['last_name']:
-             combinations3 = combine_elements([str(info['first_name']).lower()], [str(info['last_name']).lower()], separators=word_word_separators)
-             final_wordlist.update(combinations3)
-        progress_bar_comb.progress(100, text="Combinations: Complete!")
-        time.sleep(0.5) # Pause briefly
-
-        # --- Apply Suffixes ---
-        progress_status.write("Applying suffixes...")
-        mutated_wordlist = set(final_wordlist)
-        suffixes_to_add = set()
-        if add_common_numbers:
-            start, end = NUMBERS_TO_APPEND_RANGE
-            suffixes_to_add.update([str(i) for i in range(start, end + 1)])
-            suffixes_to_add.update(COMMON_NUMBER_SEQUENCES)
-        if use_special_chars_opt and unique_special_chars:
-            suffixes_to_add.update(unique_special_chars)
-            if len(unique_special_chars) >= 2:
-                max_special_combo_len = 3
-                limit = min(max_special_combo_len + 1, len(unique_special_chars) + 1)
-                for i in range(2, limit):
-                    for combo_tuple in itertools.combinations(unique_special_chars, i):
-                        suffixes_to_add.add("".join(combo_tuple))
-        suffixes_to_add.update(all_numeric_affixes)
-        final_suffixes_list = sorted(list(suffixes_to_add), key=len)
-
-        if final_suffixes_list:
-            words_to_mutate_suffix = list(mutated_wordlist)
-            total_suffix_words = len(words_to_mutate_suffix)
-            newly_suffixed_words = set()
-            for i, word in enumerate(words_to_mutate_suffix):
-                word_str = str(word)
-                if len(word_str) < max_len :
-                    relevant_suffixes = [s for s in final_suffixes_list if len(word_str) + len(str(s)) <= max_len]
-                    if relevant_suffixes:
-                         newly_suffixed_words.update(add_affixes(word_str, suffixes=relevant_suffixes))
-                if i % 1000 == 0 or i == total_suffix_words - 1: # Update progress periodically
-                    percentage = int(((i + 1) / total_suffix_words) * 100)
-                    progress_bar_suffix.progress(percentage, text=f"Suffixes: Processing {i+1}/{total_suffix_words} ({percentage}%)")
-
-            mutated_wordlist.update(newly_suffixed_words)
-        progress_bar_suffix.progress(100, text="Suffixes: Complete!")
-        time.sleep(0.5)
-
-        # --- Apply Leetspeak ---
-        activate_leet = enable_leet_opt # Use the prompt result directly
-        if activate_leet:
-            progress_status.write("Applying leetspeak...")
-            words_to_mutate_leet = list(mutated_wordlist)
-            total_leet_words = len(words_to_mutate_leet)
-            newly_leeted_words = set()
-            for i, word in enumerate(words_to_mutate_leet):
-                word_str = str(word)
-                leet_variations = apply_leet_speak(word_str) # Internal check for target chars
-                newly_leeted_words.update({lw for lw in leet_variations if len(lw) <= max_len})
-                if i % 1000 == 0 or i == total_leet_words - 1:
-                    percentage = int(((i + 1) / total_leet_words) * 100)
-                    progress_bar_leet.progress(percentage, text=f"Leetspeak: Processing {i+1}/{total_leet_words} ({percentage}%)")
-            mutated_wordlist.update(newly_leeted_words)
-            progress_bar_leet.progress(100, text="Leetspeak: Complete!")
-            time.sleep(0.5)
-        else:
-            progress_bar_leet.progress(100, text="Leetspeak: Skipped")
-
-
-        # --- Final Filtering ---
-        progress_status.write("Applying final length filter...")
-        filtered_list = {str(word) for word in mutated_wordlist if min_len <= len(str(word)) <= max_len}
-
-        st.session_state.wordlist = filtered_list
-        st.session_state.wordlist_count = len(filtered_list)
-        st.session_state.generated = True
-        progress_status.empty() # Clear status message
-        st.success(f"✅ Wordlist generation complete! Found {st.session_state.wordlist_count} potential passwords.")
+    st.session_state.output_filename = output_filename(first_name)
+
+    settings = GenerationSettings(
+        min_len=min_len, max_len=max_len, special_chars=special_chars_input,
+        years_range_enabled=years_range_enabled, year_start=year_start, year_end=year_end,
+        add_common_numbers=add_common_numbers, use_special_chars=use_special_chars_opt, enable_leet=enable_leet_opt,
+        max_candidates=max_candidates or None,
+        order="ranked" if rank_output else "stage", dedup="exact",
+        templates=tuple(t.strip() for t in templates_str.splitlines() if t.strip()),
+    )
+    previous = st.session_state.profile_state if only_new else None
+    job = GenerationJob(os.path.join(st.session_state.job_dir, st.session_state.output_filename))
+    outcome = {}
+
+    def produce(): # Runs on the job's thread: no st.* calls in here
+        engine = WordlistEngine(info, settings, progress=job.report)
+        estimate = engine.apply_budget()
+        if engine.pruned: job.report("warning", None, f"Over budget, pruned: {', '.join(dict.fromkeys(engine.pruned))}")
+        job.report("status", None, f"Estimated up to {estimate.total:,} candidates (~{estimate.seconds:.0f}s)...")
+        words, outcome['profile_state'] = incremental_stream(engine, previous)
+        return words
 
+    try:
+        st.session_state.job = job.start(produce)
+        st.session_state.job_outcome = outcome
     except Exception as e:
-         progress_status.empty()
          st.error(f"An error occurred during generation: {e}")
-         import traceback
-         st.exception(traceback.format_exc()) # Show detailed traceback in app
-         st.session_state.generated = False
 
 
-# --- Display Results and Download Button (Outside the form, appears after generation) ---
-if st.session_state.generated and st.session_state.wordlist is not None:
+# --- Live Progress, Results and Download Button (appear once a job exists) ---
+def show_job(job, running):
+    status = job.status()
     st.subheader("📊 Results")
-    st.write(f"**Total words generated:** {st.session_state.wordlist_count}")
-
-    # Prepare data for download
-    if st.session_state.wordlist_count > 0:
-        # Sort the set before joining
-        sorted_wordlist = sorted(list(st.session_state.wordlist))
-        data_to_download = "\n".join(sorted_wordlist) + "\n" # Add trailing newline
-
-        st.download_button(
-            label=f"💾 Download {st.session_state.output_filename}",
-            data=data_to_download,
-            file_name=st.session_state.output_filename,
-            mime='text/plain',
-            key='download-button' # Add a key
-        )
+    if "warning" in status.stages: st.warning(status.stages["warning"][1])
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Candidates", f"{status.count:,}")
+    col2.metric("Throughput", f"{status.rate:,.0f}/s")
+    col3.metric("Elapsed", f"{status.elapsed:.1f}s")
+
+    if job.running:
+        st.write(status.stages.get("status", (None, "Starting..."))[1])
+        for stage, label in (("combinations", "Combinations"), ("suffixes", "Suffixes"), ("leetspeak", "Leetspeak")):
+            percent, text = status.stages.get(stage, (0, f"{label}: waiting"))
+            st.progress(percent or 0, text=text)
+        if st.button("⏹️ Cancel generation"): job.cancel()
+    elif running: # Finished since the last full run: rerun once to leave polling mode
+        st.rerun()
+    elif status.state == "failed":
+        st.error(f"An error occurred during generation: {status.error}")
+        st.exception(status.error) # Show detailed traceback in app
+    elif status.state == "cancelled":
+        st.warning(f"Generation cancelled after {status.count:,} candidates.")
+    elif status.count:
+        st.success(f"✅ Wordlist generation complete! Found {status.count:,} potential passwords.")
     else:
         st.warning("No words generated matching the criteria.")
 
-elif submitted and not st.session_state.generated:
-    # Handle case where generation finished but produced nothing or errored before setting generated=True
-     if st.session_state.wordlist_count == 0:
-          st.warning("No words generated matching the criteria.")
-     # Error message is handled within the try/except block
+    if status.sample:
+        st.caption("Latest candidates")
+        st.code("\n".join(status.sample), language=None)
+
+    if not job.running and status.count and os.path.exists(job.path):
+        # The file is only read into the page when asked for, not on every rerun
+        if st.session_state.get('download_job') is not job:
+            size_mb = os.path.getsize(job.path) / (1 << 20)
+            if st.button(f"📦 Prepare download ({size_mb:,.1f} MiB)", key='prepare-download'):
+                st.session_state.download_job = job
+        if st.session_state.get('download_job') is job:
+            with open(job.path, 'rb') as f:
+                st.download_button(
+                    label=f"💾 Download {st.session_state.output_filename}" + (" (partial)" if status.state == "cancelled" else ""),
+                    data=f,
+                    file_name=st.session_state.output_filename,
+                    mime='text/plain',
+                    key='download-button', # Add a key
+                    on_click=lambda: st.session_state.pop('download_job', None) # Release the file after serving it
+                )
+
+job = st.session_state.job
+if job is not None:
+    if job.state == "done" and 'profile_state' in st.session_state.job_outcome:
+        st.session_state.profile_state = st.session_state.job_outcome.pop('profile_state') # Baseline for "only new"
+    running = job.running
+
+    @st.fragment(run_every=1 if running else None) # Polls the job without rerunning the whole page
+    def job_panel():
+        show_job(job, running)
+    job_panel()
 
 
 # --- Footer ---
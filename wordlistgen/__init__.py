@@ -0,0 +1,22 @@
+"""Target-profile wordlist generator (CUPP-style)."""
+from .config import (
+    COMMON_NUMBER_SEQUENCES,
+    DEFAULT_OUTPUT_FILENAME_BASE,
+    LEET_TARGET_CHARS,
+    MAX_YEAR,
+    MIN_YEAR,
+    NUMBERS_TO_APPEND_RANGE,
+)
+from .engine import GenerationSettings, SharedTables, WordlistEngine
+from .leet import DEFAULT_LEET_MAP, LeetEngine
+from .helpers import (
+    add_affixes,
+    apply_leet_speak,
+    combine_elements,
+    generate_case_variations,
+    generate_date_variations,
+    output_filename,
+    parse_list_input,
+    validate_date_str,
+    validate_year_str,
+)
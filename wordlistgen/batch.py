@@ -0,0 +1,94 @@
+"""Batch generation: one wordlist per target record, across a worker pool."""
+import csv
+import dataclasses
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import DEFAULT_OUTPUT_FILENAME_BASE
+from .engine import SharedTables, WordlistEngine
+from .helpers import output_filename
+from .parallel import resolve_workers
+from .profile import info_from_dict, settings_from_dict
+from .sinks import EXTENSIONS, FileSink, write_words
+
+
+@dataclasses.dataclass
+class BatchResult:
+    name: str
+    path: str
+    count: int
+
+
+def load_targets(path):
+    """Reads target records from a ``.csv`` (header row of info fields) or JSONL file."""
+    with open(path, encoding='utf-8', newline='') as f:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            return [{k: v for k, v in row.items() if k and v} for row in csv.DictReader(f)]
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def id_filename(record_id):
+    """File name for a record ``id``, reduced to word characters, dots and dashes."""
+    sanitized = re.sub(r'[^\w.-]', '_', str(record_id)).lstrip('.')
+    return f"{sanitized or DEFAULT_OUTPUT_FILENAME_BASE}.txt"
+
+
+def target_names(records, compression=None):
+    """Unique output file names: the record's ``id`` or the first-name based default."""
+    names, used = [], set()
+    suffix = EXTENSIONS[compression] if compression else ""
+    for record in records:
+        base = id_filename(record['id']) if record.get('id') else output_filename(record.get('first_name'))
+        stem, ext = os.path.splitext(base)
+        name, n = base, 1
+        while name in used:
+            n += 1
+            name = f"{stem}_{n}{ext}"
+        used.add(name)
+        names.append(name + suffix)
+    return names
+
+
+_worker_settings = None
+_worker_shared = None
+_worker_compression = None
+
+
+def _init_worker(settings, shared, compression):
+    global _worker_settings, _worker_shared, _worker_compression
+    _worker_settings, _worker_shared, _worker_compression = settings, shared, compression
+
+
+def _generate_target(record, path):
+    settings = _worker_settings
+    if record.get('settings'): settings = settings_from_dict(record['settings'], settings)
+    engine = WordlistEngine(info_from_dict(record), dataclasses.replace(settings, workers=1), shared=_worker_shared)
+    with FileSink(path, _worker_compression) as sink:
+        return write_words(engine.stream(), sink)
+
+
+def run_batch(records, out_dir, settings, jobs=None, on_result=None, compression=None):
+    """Generates ``out_dir/<name>`` for every record; returns a ``BatchResult`` list.
+
+    The common-number, special-char and year-range tables are built once and
+    shared by every target; records may carry their own ``settings`` table.
+    Each target runs single-process (``jobs`` targets at a time). With
+    ``compression`` every file is written compressed (``.gz``, ``.xz``...).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    shared = SharedTables.build(settings)
+    paths = [os.path.join(out_dir, name) for name in target_names(records, compression)]
+    root = os.path.realpath(out_dir)
+    for path in paths:
+        if os.path.dirname(os.path.realpath(path)) != root:
+            raise ValueError(f"Output file {path!r} resolves outside {out_dir!r}")
+    results = []
+    with ProcessPoolExecutor(max_workers=resolve_workers(jobs), initializer=_init_worker, initargs=(settings, shared, compression)) as pool:
+        futures = [pool.submit(_generate_target, record, path) for record, path in zip(records, paths)]
+        for path, future in zip(paths, futures):
+            result = BatchResult(os.path.basename(path), path, future.result())
+            if on_result: on_result(result)
+            results.append(result)
+    return results
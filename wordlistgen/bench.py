@@ -0,0 +1,211 @@
+"""Reproducible per-stage benchmarks (``python -m wordlistgen bench``).
+
+Runs fixed synthetic profiles through every stage for each combination of
+the common-numbers / special-chars / leetspeak toggles and records, per
+stage, wall time, candidates per second, peak RSS and output size. Each case
+runs in a fresh process so peak RSS is not inherited from earlier cases.
+
+A stage's peak RSS is sampled while the stage runs (``RSSSampler``), so a
+later stage does not report an earlier stage's peak; ``rss_growth_kb`` is
+that peak minus the RSS when the stage started. Where the current RSS
+cannot be read (no ``/proc``), stages report ``process_peak_rss_kb``, the
+peak of the whole process so far, instead.
+
+With ``workers`` other than 1, each case also times the whole run on one
+process (``total_serial``) and with dedup inside the pool
+(``total_partitioned``, unless dedup is ``bloom``), and reports ``speedup``
+as their ratio.
+"""
+import dataclasses
+import datetime
+import itertools
+import json
+import platform
+import resource
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import GenerationSettings, WordlistEngine
+from .parallel import PARTITIONED_DEDUP
+from .profile import info_from_dict
+
+PROFILES = {
+    "small": {
+        'first_name': 'John', 'last_name': 'Smith', 'birth_date': '1985-03-14', 'pet_names': ['Rex'],
+    },
+    "medium": {
+        'first_name': 'John', 'last_name': 'Smith', 'nicknames': ['johnny', 'js'], 'birth_date': '1985-03-14',
+        'partner_first_name': 'Alice', 'anniversary_date': '2010-06-01', 'children_names': ['Zoe'],
+        'children_birth_dates_str': ['2012-09-30'], 'pet_names': ['Rex'], 'company_name': 'Acme', 'city': 'Boston',
+        'interests': ['golf'], 'keywords': ['blue'], 'important_years': ['1999'], 'lucky_numbers': ['7', '42'],
+    },
+    "large": {
+        'first_name': 'Jonathan', 'last_name': 'Smithers', 'nicknames': ['johnny', 'jon', 'smitty'], 'birth_date': '1985-03-14',
+        'partner_first_name': 'Alice', 'partner_last_name': 'Walker', 'partner_nicknames': ['ally'],
+        'partner_birth_date': '1987-11-02', 'anniversary_date': '2010-06-01',
+        'children_names': ['Zoe', 'Liam'], 'children_birth_dates_str': ['2012-09-30', '2015-04-18'],
+        'pet_names': ['Rex', 'Bella'], 'company_name': 'Acme', 'job_title': 'Engineer', 'city': 'Boston',
+        'country': 'USA', 'street_name': 'Elm', 'interests': ['golf', 'chess', 'guitar'],
+        'keywords': ['blue', 'mustang', 'celtics'], 'important_years': ['1999', '2004'], 'lucky_numbers': ['7', '42', '13'],
+    },
+}
+TOGGLES = ('add_common_numbers', 'use_special_chars', 'enable_leet')
+DEFAULT_SETTINGS = {'max_len': 12} # Keeps the large leet+special cases to a few minutes
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far, in KiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak # macOS reports bytes
+
+
+def current_rss_kb():
+    """Current resident set size in KiB, or None where ``/proc`` is unavailable."""
+    try:
+        with open("/proc/self/statm") as f: pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+class RSSSampler:
+    """Samples the current RSS on a background thread; ``peak`` and ``start`` in KiB."""
+
+    INTERVAL = 0.005
+
+    def __init__(self):
+        self.start = self.peak = current_rss_kb()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.INTERVAL): self.peak = max(self.peak, current_rss_kb())
+
+    def __enter__(self):
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, current_rss_kb())
+
+
+def _measure(stage, func, input_size):
+    with RSSSampler() as rss:
+        start = time.perf_counter()
+        output, size, nbytes = func()
+        wall = time.perf_counter() - start
+    memory = {"process_peak_rss_kb": peak_rss_kb()} if rss.start is None else {"peak_rss_kb": rss.peak, "rss_growth_kb": rss.peak - rss.start}
+    return output, {
+        "stage": stage, "input_size": input_size, "output_size": size, "output_bytes": nbytes,
+        "wall_s": round(wall, 6), "candidates_per_s": round(size / wall, 1) if wall else None,
+        **memory,
+    }
+
+
+def _sized(words):
+    return words, len(words), sum(len(w) + 1 for w in words)
+
+
+def _counted(words):
+    count = nbytes = 0
+    for word in words:
+        count += 1
+        nbytes += len(word) + 1
+    return None, count, nbytes
+
+
+def run_case(profile, settings):
+    """Runs one profile/settings case stage by stage; returns the stage records."""
+    engine = WordlistEngine(info_from_dict(PROFILES[profile]), settings)
+    s = engine.settings
+    stages = []
+    def record(stage, func, input_size):
+        output, stats = _measure(stage, func, input_size)
+        stages.append(stats)
+        return output
+
+    base_words = record("base_words", lambda: _sized(engine.base_words()), 0)
+    all_dates = engine.all_dates()
+    dates = record("dates", lambda: _sized(engine.date_variations(all_dates)), len(all_dates))
+    years = record("years", lambda: _sized(engine.year_nums(all_dates)), len(all_dates))
+    numeric_affixes = engine.merge_numeric(dates, years)
+    combined = record("combinations", lambda: _sized(engine.combinations(base_words, numeric_affixes)), len(base_words) + len(numeric_affixes))
+    stems = [w for w in combined if len(w) <= s.max_len]
+    suffixes = engine.suffixes(numeric_affixes)
+    record("suffixes", lambda: _counted(engine.iter_suffixed(stems, suffixes)), len(stems))
+    if s.enable_leet:
+        record("leetspeak", lambda: _counted(engine.iter_leet(stems, suffixes)), len(stems))
+    record("total", lambda: _counted(engine.stream()), len(stems))
+    if s.workers != 1:
+        serial = WordlistEngine(engine.info, dataclasses.replace(s, workers=1))
+        record("total_serial", lambda: _counted(serial.stream()), len(stems))
+        if s.dedup in PARTITIONED_DEDUP:
+            record("total_partitioned", lambda: _buffered(engine.partitioned_buffers()), len(stems))
+    return stages
+
+
+def _buffered(buffers):
+    count = nbytes = 0
+    for data, lines in buffers:
+        count += lines
+        nbytes += len(data)
+    return None, count, nbytes
+
+
+def _run_isolated(profile, settings):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run_case, profile, settings).result()
+
+
+def run_benchmarks(profiles=("small", "medium", "large"), base_settings=None, repeat=1, isolate=True, on_case=None):
+    """Runs every profile x toggle combination; returns a JSON-serialisable report.
+
+    With ``repeat`` > 1 each stage keeps its fastest run.
+    """
+    base_settings = base_settings or GenerationSettings(**DEFAULT_SETTINGS)
+    cases = []
+    for profile in profiles:
+        for values in itertools.product([False, True], repeat=len(TOGGLES)):
+            toggles = dict(zip(TOGGLES, values))
+            settings = dataclasses.replace(base_settings, **toggles)
+            runs = [(_run_isolated if isolate else run_case)(profile, settings) for _ in range(repeat)]
+            stages = [min(attempts, key=lambda r: r["wall_s"]) for attempts in zip(*runs)]
+            case = {"profile": profile, "toggles": toggles, "stages": stages}
+            walls = {st["stage"]: st["wall_s"] for st in stages}
+            if walls.get("total_partitioned"): case["speedup"] = round(walls["total_serial"] / walls["total_partitioned"], 2)
+            if on_case: on_case(case)
+            cases.append(case)
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {k: v for k, v in dataclasses.asdict(base_settings).items() if k not in TOGGLES},
+        "repeat": repeat,
+        "cases": cases,
+    }
+
+
+def format_case(case):
+    """One summary line per stage for terminal output."""
+    flags = "".join(flag if case["toggles"][name] else "-" for flag, name in zip("nsl", TOGGLES))
+    lines = []
+    for st in case["stages"]:
+        rate = f"{st['candidates_per_s']:>12,.0f}/s" if st["candidates_per_s"] else " " * 14
+        peak = st.get("peak_rss_kb", st.get("process_peak_rss_kb"))
+        growth = f" (+{st['rss_growth_kb'] // 1024} MiB)" if "rss_growth_kb" in st else " (process peak)"
+        lines.append(f"{case['profile']:<7} {flags} {st['stage']:<17} {st['output_size']:>11,} {st['wall_s']:>9.3f}s {rate} {peak // 1024:>6} MiB{growth}")
+    if "speedup" in case: lines.append(f"{case['profile']:<7} {flags} {'speedup':<17} {case['speedup']:>10.2f}x (serial / partitioned)")
+    return "\n".join(lines)
+
+
+def save_report(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
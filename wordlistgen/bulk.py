@@ -0,0 +1,371 @@
+"""NumPy bulk backend for the cross-products.
+
+The Python backend builds ``stem + suffix`` and ``a + sep + b`` one string
+at a time. This backend encodes each word and affix set once as a padded
+UTF-8 byte matrix (``StringTable``). It then builds whole blocks of the
+cross-product with array gathers: length filtering, in-batch dedup, and
+exclusion of the stems. A ``Batch`` goes to disk as one newline buffer, or
+as an Arrow record batch built from the same bytes, so no Python string is
+created per candidate.
+
+With ``settings.backend = "numpy"``, ``WordlistEngine.combine`` uses
+``combine_elements`` from here. ``staged_batches`` yields the whole staged
+pipeline as batches, and ``write_batches`` writes them to a sink. Leetspeak
+and template words are still produced in Python. Dedup follows
+``settings.dedup``:
+
+* ``exact``: every batch goes through ``SeenRows``, which keeps the hashes
+  and bytes of all rows written so far, so nothing repeats;
+* ``window``: suffixed words are deduplicated within each batch and against
+  the stems, and the Python words go through the window deduper. A word
+  made by splitting stem and suffix differently (``"ab" + "c"`` vs
+  ``"a" + "bc"``) may still repeat across batches;
+* ``bloom`` and ``external`` work on Python strings and are rejected; use
+  the Python backend for them.
+
+Needs ``numpy``; Arrow output also needs ``pyarrow``.
+"""
+from itertools import chain, islice
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BACKENDS = ("python", "numpy")
+BULK_DEDUP = ("exact", "window") # Dedup modes staged_batches implements
+BULK_BATCH = 65536 # Candidate rows built per block
+NEWLINE = ord("\n")
+
+
+def check_backend(name):
+    """Raises for an unknown backend, or for ``numpy`` without numpy installed."""
+    if name not in BACKENDS: raise ValueError(f"Unknown backend {name!r}; expected one of {', '.join(BACKENDS)}")
+    if name == "numpy" and np is None:
+        raise ImportError("The numpy backend needs the 'numpy' package (pip install numpy)")
+
+
+class StringTable:
+    """Strings as a zero-padded ``uint8`` matrix plus byte and character lengths."""
+
+    def __init__(self, words):
+        self.words = list(words)
+        encoded = [w.encode('utf-8') for w in self.words]
+        self.nbytes = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self.chars = np.fromiter(map(len, self.words), dtype=np.int64, count=len(self.words))
+        self.width = max(int(self.nbytes.max()) if encoded else 0, 1)
+        self.matrix = np.array(encoded, dtype=f"S{self.width}").view(np.uint8).reshape(len(encoded), self.width)
+
+    def __len__(self):
+        return len(self.words)
+
+    def keys(self):
+        return self.matrix.view(f"S{self.width}").ravel()
+
+
+def _row_width(width):
+    """Row width rounded up to whole 8-byte words, so rows can be hashed a word at a time."""
+    return -(-width // 8) * 8
+
+
+def _join(columns):
+    """Concatenates ``table[idx]`` row-wise over ``(table, idx)`` columns into a ``Batch``.
+
+    Rows are copied in groups that share the same byte offset for a column,
+    so each group is one plain row gather.
+    """
+    lengths = [table.nbytes[idx] for table, idx in columns]
+    total = sum(lengths)
+    out = np.zeros((len(total), _row_width(sum(table.width for table, _ in columns) + 1)), dtype=np.uint8)
+    start = np.zeros(len(total), dtype=np.int64)
+    for (table, idx), length in zip(columns, lengths):
+        for offset in np.unique(start):
+            rows = np.flatnonzero(start == offset)
+            out[rows, offset:offset + table.width] |= table.matrix[idx[rows]] # Earlier parts end before offset
+        start += length
+    return Batch(out, total)
+
+
+def _mix(h, word):
+    h = (h ^ word) * np.uint64(0x9E3779B97F4A7C15)
+    return h ^ (h >> np.uint64(29))
+
+
+class Batch:
+    """Candidate rows: a zero-padded ``uint8`` matrix and the byte length of each row."""
+
+    def __init__(self, matrix, lengths):
+        self.matrix = matrix
+        self.lengths = lengths
+
+    @classmethod
+    def from_words(cls, words):
+        table = StringTable(words)
+        matrix = np.zeros((len(table), _row_width(table.width + 1)), dtype=np.uint8)
+        matrix[:, :table.width] = table.matrix
+        return cls(matrix, table.nbytes)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def _take(self, rows):
+        return Batch(self.matrix[rows], self.lengths[rows])
+
+    def keys(self):
+        """Rows as fixed-width ``bytes`` scalars (trailing padding ignored)."""
+        return np.ascontiguousarray(self.matrix).view(f"S{self.matrix.shape[1]}").ravel()
+
+    def hashes(self):
+        """64-bit hash per row; equal rows hash equal whatever the matrix width."""
+        words = np.ascontiguousarray(self.matrix).view(np.uint64)
+        h = np.zeros(len(self), dtype=np.uint64)
+        for k in range(words.shape[1]):
+            column = words[:, k]
+            h = np.where(column != 0, _mix(h, column), h) # All-zero words are padding
+        return h
+
+    def unique(self):
+        """Drops repeated rows, keeping first occurrences in order.
+
+        Rows are sorted by hash and only neighbours with equal hashes are
+        compared byte for byte, so a hash collision never drops a word.
+        """
+        h = self.hashes()
+        order = np.argsort(h, kind='stable')
+        h = h[order]
+        same = np.flatnonzero(h[1:] == h[:-1])
+        if not same.size: return self
+        keys = self.keys()
+        repeated = order[same + 1][keys[order[same + 1]] == keys[order[same]]]
+        keep = np.ones(len(self), dtype=bool)
+        keep[repeated] = False
+        return self._take(keep)
+
+    def excluding(self, other):
+        """Drops rows found in ``other`` (a ``RowSet``)."""
+        return self._take(~other.contains(self))
+
+    def head(self, n):
+        return self._take(slice(0, max(n, 0)))
+
+    def lines(self):
+        """The rows as one newline-terminated UTF-8 buffer."""
+        rows = np.arange(len(self))
+        matrix = self.matrix.copy()
+        matrix[rows, self.lengths] = NEWLINE
+        return matrix[np.arange(matrix.shape[1])[None, :] <= self.lengths[:, None]].tobytes()
+
+    def words(self):
+        return [key.decode('utf-8') for key in self.keys().tolist()]
+
+    def to_arrow(self):
+        """The rows as a ``pyarrow.RecordBatch`` with one ``word`` column."""
+        import pyarrow as pa
+        data = self.matrix[np.arange(self.matrix.shape[1])[None, :] < self.lengths[:, None]].tobytes()
+        offsets = np.concatenate(([0], np.cumsum(self.lengths))).astype(np.int32)
+        words = pa.StringArray.from_buffers(len(self), pa.py_buffer(offsets.tobytes()), pa.py_buffer(data))
+        return pa.record_batch([words], names=["word"])
+
+
+class RowSet:
+    """The rows of a ``Batch``, indexed by hash for membership tests."""
+
+    def __init__(self, batch):
+        hashes = batch.hashes()
+        self.order = np.argsort(hashes, kind='stable')
+        self.hashes = hashes[self.order]
+        self.keys = batch.keys()
+
+    def contains(self, batch):
+        """Mask of the rows of ``batch`` present here (hash hits confirmed byte for byte)."""
+        hashes = batch.hashes()
+        pos = np.minimum(np.searchsorted(self.hashes, hashes), max(len(self.hashes) - 1, 0))
+        found = np.zeros(len(batch), dtype=bool)
+        if not len(self.hashes): return found
+        hits = np.flatnonzero(self.hashes[pos] == hashes)
+        found[hits] = batch.keys()[hits] == self.keys[self.order[pos[hits]]]
+        return found
+
+
+class SeenRows:
+    """Exact filter across batches: the rows kept so far in an open-addressing hash table.
+
+    Lookups and inserts probe whole batches at once. Hash hits are confirmed
+    byte for byte; a row whose hash collides with a different stored row is
+    kept but not stored, so a collision can repeat a word but never drop one.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        self.table = np.zeros(capacity, dtype=np.uint64) # 0 marks an empty slot
+        self.refs = np.zeros(capacity, dtype=np.int64) # batch << 32 | row of each stored hash
+        self.size = 0
+        self.keys = [] # Keys of each kept batch
+
+    def _probe(self, hashes):
+        """Slot holding each hash, or the empty slot where linear probing stops."""
+        mask = len(self.table) - 1
+        slots = (hashes >> np.uint64(65 - len(self.table).bit_length())).astype(np.int64) # High bits mix best
+        pending = np.arange(len(hashes))
+        while pending.size:
+            current = self.table[slots[pending]]
+            pending = pending[(current != hashes[pending]) & (current != 0)]
+            slots[pending] = (slots[pending] + 1) & mask
+        return slots
+
+    def _insert(self, hashes, refs, slots=None):
+        """Stores distinct ``hashes``, starting from ``slots`` if already probed; returns a mask of the ones stored."""
+        stored = np.zeros(len(hashes), dtype=bool)
+        pending = np.arange(len(hashes))
+        while pending.size:
+            if slots is None: slots = self._probe(hashes[pending])
+            free = self.table[slots] == 0
+            pending, slots = pending[free], slots[free] # The rest collide with a stored hash
+            self.table[slots] = hashes[pending]
+            won = self.table[slots] == hashes[pending] # Rows racing for one slot: the last write wins
+            self.refs[slots[won]] = refs[pending[won]]
+            stored[pending[won]] = True
+            pending, slots = pending[~won], None
+        self.size += int(stored.sum())
+        return stored
+
+    def _grow(self, rows):
+        if (self.size + rows) * 2 <= len(self.table): return
+        used = np.flatnonzero(self.table)
+        hashes, refs = self.table[used], self.refs[used]
+        capacity = len(self.table)
+        while (self.size + rows) * 2 > capacity: capacity *= 2
+        self.table = np.zeros(capacity, dtype=np.uint64)
+        self.refs = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+        self._insert(hashes, refs)
+
+    def filter(self, batch):
+        """``batch`` (distinct rows, see ``Batch.unique``) without the rows seen before; remembers the rest."""
+        hashes = batch.hashes()
+        hashes[hashes == 0] = 1
+        self._grow(len(batch))
+        slots = self._probe(hashes)
+        hits = np.flatnonzero(self.table[slots] == hashes)
+        refs = self.refs[slots[hits]]
+        owners, rows = refs >> 32, refs & 0xFFFFFFFF
+        keys = batch.keys()[hits]
+        keep = np.ones(len(batch), dtype=bool)
+        for owner in np.unique(owners): # Confirm hash hits byte for byte
+            mine = owners == owner
+            keep[hits[mine]] = keys[mine] != self.keys[owner][rows[mine]]
+        batch, hashes = batch._take(keep), hashes[keep]
+        if len(batch):
+            self._insert(hashes, (len(self.keys) << 32) | np.arange(len(batch)), slots[keep])
+            self.keys.append(batch.keys())
+        return batch
+
+
+# --- Cross-products ---
+
+def suffixed(stems, suffixes, min_len, max_len, batch_rows=BULK_BATCH, progress=None):
+    """Yields batches of ``stem + suffix`` within ``min_len``..``max_len``, stem by stem.
+
+    ``progress(done, total)`` is called after each block of stems.
+    """
+    left, right = StringTable(stems), StringTable(suffixes)
+    if not len(left) or not len(right): return
+    step = max(1, batch_rows // len(right))
+    for start in range(0, len(left), step):
+        block = np.arange(start, min(start + step, len(left)))
+        total = left.chars[block, None] + right.chars[None, :]
+        i, j = np.nonzero((total >= min_len) & (total <= max_len))
+        if i.size: yield _join([(left, block[i]), (right, j)]).unique()
+        if progress: progress(block[-1] + 1, len(left))
+
+
+def combine_elements(list1, list2, separators=None):
+    """Vectorised ``helpers.combine_elements``: the same combinations, as a list."""
+    items1 = [s for s in (str(x).strip() for x in list1 or []) if s]
+    items2 = [s for s in (str(x).strip() for x in list2 or []) if s]
+    if not items1 or not items2: return []
+    separators = [str(sep) for sep in separators] if separators else [""]
+    a, b, seps = StringTable(items1), StringTable(items2), StringTable(separators)
+    i = np.repeat(np.arange(len(a)), len(b))
+    j = np.tile(np.arange(len(b)), len(a))
+    if "" in separators: # An item is never combined with itself when a separator is empty
+        keep = a.keys()[i] != b.keys()[j]
+        i, j = i[keep], j[keep]
+    batches = []
+    for k in range(len(seps)):
+        sep = np.full(len(i), k)
+        batches.append(_join([(a, i), (seps, sep), (b, j)]).keys())
+        batches.append(_join([(b, j), (seps, sep), (a, i)]).keys())
+    keys = np.unique(np.concatenate(batches))
+    return [key.decode('utf-8') for key in keys.tolist()]
+
+
+# --- Pipeline ---
+
+def staged_batches(engine, batch_size=BULK_BATCH):
+    """Yields the candidates of ``engine.staged_candidates`` as ``Batch`` es.
+
+    Stems come first, then the suffix stage, then templates and leetspeak.
+    Settings the backend cannot honour raise here, before anything is built.
+    """
+    check_backend("numpy")
+    s = engine.settings
+    if s.order != "stage": raise ValueError("The numpy backend only supports stage order")
+    if s.dedup not in BULK_DEDUP:
+        raise ValueError(f"The numpy backend supports --dedup {' or '.join(BULK_DEDUP)}, not {s.dedup!r}")
+    return _staged_batches(engine, batch_size)
+
+
+def _staged_batches(engine, batch_size):
+    s = engine.settings
+    if s.max_candidates and engine.estimate is None: engine.apply_budget()
+    engine._report("status", None, "Processing base words and dates...")
+    base_words = engine.base_words()
+    numeric_affixes = engine.numeric_affixes()
+
+    engine._report("status", None, "Generating combinations...")
+    stems = sorted(w for w in engine.combinations(base_words, numeric_affixes) if len(w) <= s.max_len) # Reproducible truncation
+    suffixes = engine.suffixes(numeric_affixes)
+    stem_batch = Batch.from_words(stems)
+    if s.dedup == "exact":
+        seen = SeenRows()
+        seen.filter(stem_batch.unique()) # Stems are excluded even when too short to be written
+        dedup = seen.filter
+    else:
+        stem_keys = RowSet(stem_batch)
+        dedup = lambda batch: batch.excluding(stem_keys)
+    yield stem_batch._take(np.fromiter((len(w) >= s.min_len for w in stems), dtype=bool, count=len(stems)))
+
+    engine._report("status", None, "Applying suffixes...")
+    def report(done, total):
+        percentage = int(done / total * 100)
+        engine._report("suffixes", percentage, f"Suffixes: Processing {done}/{total} ({percentage}%)")
+    for batch in suffixed(stems, list(suffixes), s.min_len, s.max_len, batch_size, progress=report):
+        yield dedup(batch)
+    engine._report("suffixes", 100, "Suffixes: Complete!")
+
+    python_words = []
+    if engine.templates: python_words.append(engine.iter_templates())
+    if s.enable_leet:
+        engine._report("status", None, "Applying leetspeak...")
+        python_words.append(engine.expand_stage("leetspeak", stems, suffixes))
+        if engine.templates: python_words.append(engine.template_leet(engine.iter_templates()))
+    words = chain.from_iterable(python_words)
+    if s.dedup == "window": words = engine.deduper().filter(words)
+    while True:
+        chunk = list(islice(words, batch_size))
+        if not chunk: break
+        yield dedup(Batch.from_words(chunk).unique())
+    engine._report("leetspeak", 100, "Leetspeak: Complete!" if s.enable_leet else "Leetspeak: Skipped")
+
+
+def write_batches(batches, sink, limit=None):
+    """Writes ``Batch`` es to a sink, as record batches where it takes them; returns the count."""
+    count = 0
+    for batch in batches:
+        if limit: batch = batch.head(limit - count)
+        if not len(batch): continue
+        if hasattr(sink, 'write_record_batch'): sink.write_record_batch(batch.to_arrow())
+        else: sink.write_buffer(batch.lines(), len(batch))
+        count += len(batch)
+        if limit and count >= limit: break
+    return count
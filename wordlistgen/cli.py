@@ -0,0 +1,339 @@
+"""Command-line entry point (``python -m wordlistgen``)."""
+import argparse
+import json
+import os
+import sys
+
+from . import rules
+from .batch import load_targets, run_batch
+from .bulk import BACKENDS, staged_batches, write_batches
+from .dedup import DEDUPERS
+from .engine import DATE_FIELDS, LIST_FIELDS, STRING_FIELDS, WordlistEngine
+from .estimate import estimate
+from .helpers import output_filename
+from .incremental import StateStore, incremental_stream, settings_key
+from .parallel import PARTITIONED_DEDUP
+from .profile import info_from_dict, load_profile_data, settings_from_dict
+from .sinks import EXTENSIONS, open_sink, write_buffers, write_words
+from .wordindex import DEFAULT_BLOCK_SIZE, INDEX_EXTENSION, WordIndex, difference, sorted_keys, union, write_index, write_keys
+
+
+def _flag(name):
+    return "--" + name.replace('_', '-')
+
+
+def add_target_arguments(parser):
+    """One flag per ``info`` field, plus ``--profile``; flags override the profile."""
+    group = parser.add_argument_group("target")
+    group.add_argument("-p", "--profile", help="JSON or TOML profile with target fields and an optional [settings] table")
+    for name in STRING_FIELDS:
+        group.add_argument(_flag(name), dest=name, metavar="TEXT")
+    for name in LIST_FIELDS:
+        group.add_argument(_flag(name), dest=name, metavar="A,B,...", help="comma separated")
+    for name in DATE_FIELDS:
+        group.add_argument(_flag(name), dest=name, metavar="YYYY-MM-DD")
+
+
+def add_settings_arguments(parser):
+    """Flags for ``GenerationSettings``; unset flags keep the profile/default value."""
+    group = parser.add_argument_group("settings")
+    group.add_argument("--min-len", type=int)
+    group.add_argument("--max-len", type=int)
+    group.add_argument("--special-chars", metavar="CHARS")
+    group.add_argument("--years", type=int, nargs=2, metavar=("START", "END"), help="add a range of years")
+    group.add_argument("--common-numbers", dest="add_common_numbers", action="store_true", default=None, help="append 0-99 and common sequences")
+    group.add_argument("--special", dest="use_special_chars", action="store_true", default=None, help="use special chars as suffixes and separators")
+    group.add_argument("--leet", dest="enable_leet", action="store_true", default=None, help="enable leetspeak")
+    group.add_argument("--max-leet-replacements", type=int)
+    group.add_argument("--leet-map", metavar="FILE", help="JSON file mapping characters to substitutions")
+    group.add_argument("--dedup", choices=sorted(DEDUPERS))
+    group.add_argument("--dedup-window", type=int)
+    group.add_argument("--bloom-capacity", type=int)
+    group.add_argument("--bloom-error-rate", type=float)
+    group.add_argument("--spill-run-size", type=int)
+    group.add_argument("--spill-dir")
+    group.add_argument("--workers", type=int, help="processes for suffixes/leetspeak (0 = all cores); stage-order generate then dedups exactly in the pool unless --dedup bloom")
+    group.add_argument("--chunk-size", type=int)
+    group.add_argument("--backend", choices=BACKENDS, help="numpy: build suffix and combination cross-products in bulk (--dedup exact or window)")
+    group.add_argument("--ranked", dest="order", action="store_const", const="ranked", help="emit the likeliest candidates first")
+    group.add_argument("--max-candidates", type=int, help="budget: prune stages to fit, then truncate (with --ranked: top K)")
+    group.add_argument("--template", dest="templates", action="append", metavar="SPEC",
+                       help="n-ary combination template, e.g. '{name}{keyword}{year}' (repeatable; see templates.SLOTS)")
+    group.add_argument("--date-cache", dest="date_cache_path", metavar="FILE", help="JSON file persisting date variations between runs")
+
+
+SETTINGS_ARGUMENTS = [
+    'min_len', 'max_len', 'special_chars', 'add_common_numbers', 'use_special_chars', 'enable_leet',
+    'max_leet_replacements', 'dedup', 'dedup_window', 'bloom_capacity', 'bloom_error_rate',
+    'spill_run_size', 'spill_dir', 'workers', 'chunk_size', 'date_cache_path',
+    'max_candidates', 'order', 'templates', 'backend',
+]
+
+
+def target_from_args(args):
+    """Builds ``(info, settings)`` from ``--profile`` and the individual flags."""
+    data = load_profile_data(args.profile) if args.profile else {}
+    for name in STRING_FIELDS + LIST_FIELDS + DATE_FIELDS:
+        value = getattr(args, name)
+        if value is not None: data[name] = value
+    return info_from_dict(data), settings_from_args(args, data.get('settings'))
+
+
+def settings_from_args(args, profile_settings=None):
+    """``GenerationSettings`` from defaults, then ``profile_settings``, then flags."""
+    overrides = dict(profile_settings or {})
+    overrides.update({name: getattr(args, name) for name in SETTINGS_ARGUMENTS if getattr(args, name) is not None})
+    if args.years:
+        overrides.update(years_range_enabled=True, year_start=args.years[0], year_end=args.years[1])
+    if args.leet_map:
+        with open(args.leet_map, encoding='utf-8') as f:
+            overrides['leet_map'] = json.load(f)
+    return settings_from_dict(overrides)
+
+
+def add_output_arguments(parser):
+    group = parser.add_argument_group("output")
+    group.add_argument("--compress", choices=sorted(EXTENSIONS), help="compress output (default: from the file extension)")
+    group.add_argument("--compress-level", type=int, metavar="N")
+    group.add_argument("--split-lines", type=int, metavar="N", help="start a new numbered file every N lines")
+    group.add_argument("--split-bytes", type=int, metavar="N", help="start a new numbered file every N uncompressed bytes")
+    group.add_argument("--background-writer", action="store_true", help="write (and compress) on a separate thread")
+
+
+def state_name(args, info):
+    """``--state-name``, else the profile file name, else the output file name."""
+    if args.state_name: return args.state_name
+    if args.profile: return os.path.splitext(os.path.basename(args.profile))[0]
+    return os.path.splitext(output_filename(info.get('first_name')))[0]
+
+
+def partitioned(settings):
+    """Whether ``generate`` dedups inside the worker pool (see ``WordlistEngine.partitioned_buffers``).
+
+    Bloom dedup keeps its fixed memory budget on the parent's deduper instead.
+    """
+    return (settings.workers != 1 and settings.order == "stage" and not settings.max_candidates
+            and settings.dedup in PARTITIONED_DEDUP)
+
+
+def cmd_generate(args):
+    info, settings = target_from_args(args)
+    metrics = None
+    if args.metrics:
+        from .metrics import InstrumentedEngine, Instrumentation
+        metrics = Instrumentation(trace_memory=args.tracemalloc, profile_cpu=args.cprofile)
+        metrics.start()
+        engine = InstrumentedEngine(info, settings, metrics=metrics)
+    else:
+        engine = WordlistEngine(info, settings)
+    store = previous = batches = buffers = None
+    if args.state_dir:
+        store, name = StateStore(args.state_dir), state_name(args, info)
+        previous = store.load(name)
+        words, state = incremental_stream(engine, previous)
+        if previous is not None and previous.key != settings_key(engine.settings): previous = None
+    elif engine.settings.backend == "numpy" and engine.settings.order == "stage":
+        batches = staged_batches(engine)
+    elif partitioned(engine.settings):
+        buffers = engine.partitioned_buffers()
+    else:
+        words = engine.stream()
+    sink = open_sink(args.output, args.compress, args.compress_level, args.split_lines, args.split_bytes, args.background_writer)
+    try:
+        if batches is not None: count = write_batches(batches, sink, engine.settings.max_candidates)
+        elif buffers is not None: count = write_buffers(buffers, sink)
+        else: count = write_words(words, sink)
+    finally:
+        sink.close()
+        if metrics: metrics.stop()
+    if store: store.save(name, state)
+    if metrics: metrics.save(args.metrics)
+    if not args.quiet:
+        if engine.pruned: print(f"Pruned to fit budget: {', '.join(engine.pruned)}", file=sys.stderr)
+        print(f"Wrote {count} {'new ' if previous else ''}candidates", file=sys.stderr)
+    return 0
+
+
+def cmd_estimate(args):
+    info, settings = target_from_args(args)
+    engine = WordlistEngine(info, settings)
+    result = engine.apply_budget() if settings.max_candidates else estimate(engine)
+    print(json.dumps(dict(result.as_dict(), pruned=engine.pruned), indent=2))
+    return 0
+
+
+def cmd_rules(args):
+    info, settings = target_from_args(args)
+    if settings.max_candidates or settings.order == "ranked":
+        raise ValueError("rules cannot express --max-candidates or --ranked; hashcat applies every rule to every word")
+    engine = WordlistEngine(info, settings)
+    manifest = rules.export_rules(engine, args.output_dir)
+    if not args.quiet:
+        print(f"Wrote {len(manifest['groups'])} dictionary/rule pairs ({manifest['dictionary_words']} words, "
+              f"{manifest['expanded_candidates']} candidates when expanded) to {args.output_dir}", file=sys.stderr)
+    if args.verify and not rules.verify(engine, args.output_dir):
+        print("wordlistgen: error: rule expansion does not match the generated wordlist", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_batch(args):
+    records = load_targets(args.targets)
+    settings = settings_from_args(args)
+    def report(result):
+        if not args.quiet: print(f"{result.name}: {result.count} candidates", file=sys.stderr)
+    results = run_batch(records, args.output_dir, settings, jobs=args.jobs, on_result=report, compression=args.compress)
+    if not args.quiet: print(f"Wrote {len(results)} wordlists to {args.output_dir}", file=sys.stderr)
+    return 0
+
+
+def cmd_bench(args):
+    from . import bench
+    profiles = [p.strip() for p in args.profiles.split(',') if p.strip()]
+    unknown = set(profiles) - set(bench.PROFILES)
+    if unknown: raise ValueError(f"Unknown benchmark profiles: {', '.join(sorted(unknown))}")
+    settings = settings_from_args(args, bench.DEFAULT_SETTINGS)
+    report = bench.run_benchmarks(profiles, settings, repeat=args.repeat,
+                                  on_case=lambda case: print(bench.format_case(case), file=sys.stderr))
+    if args.output: bench.save_report(report, args.output)
+    else: print(json.dumps(report, indent=2))
+    return 0
+
+
+def write_sorted(keys, output, block_size=DEFAULT_BLOCK_SIZE):
+    """Writes sorted keys to a ``.wlx`` file directly, else as text through ``open_sink``."""
+    if output.lower().endswith(INDEX_EXTENSION): return write_index(keys, output, block_size, presorted=True)
+    sink = open_sink(output)
+    try:
+        return write_keys(keys, sink)
+    finally:
+        sink.close()
+
+
+def input_keys(paths, args):
+    return [sorted_keys(path, args.run_size, args.tmp_dir) for path in paths]
+
+
+def cmd_index_build(args):
+    count = write_index(union(*input_keys(args.inputs, args)), args.output, args.block_size, presorted=True)
+    if not args.quiet: print(f"Indexed {count} words into {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_index_lookup(args):
+    with WordIndex(args.index) as index:
+        found = [word in index for word in args.words]
+    for word, hit in zip(args.words, found):
+        print(f"{word}\t{'found' if hit else 'missing'}")
+    return 0 if all(found) else 1
+
+
+def cmd_index_union(args):
+    count = write_sorted(union(*input_keys(args.inputs, args)), args.output, args.block_size)
+    if not args.quiet: print(f"Wrote {count} words", file=sys.stderr)
+    return 0
+
+
+def cmd_index_diff(args):
+    count = write_sorted(difference(*input_keys([args.first] + args.others, args)), args.output, args.block_size)
+    if not args.quiet: print(f"Wrote {count} words", file=sys.stderr)
+    return 0
+
+
+def cmd_index_export(args):
+    count = write_sorted(sorted_keys(args.index), args.output)
+    if not args.quiet: print(f"Exported {count} words", file=sys.stderr)
+    return 0
+
+
+def add_index_arguments(parser):
+    parser.add_argument("-o", "--output", required=True, help=f"{INDEX_EXTENSION} file, or plain text (compressed by extension)")
+    parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE, help="words per index block")
+    parser.add_argument("--run-size", type=int, default=1_000_000, help="words sorted in memory per run for text inputs")
+    parser.add_argument("--tmp-dir", help="directory for sort runs")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="wordlistgen", description="Generate target-specific password candidates.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="stream one wordlist to stdout or a file")
+    add_target_arguments(generate)
+    add_settings_arguments(generate)
+    generate.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    add_output_arguments(generate)
+    generate.add_argument("--state-dir", metavar="DIR", help="keep per-profile stage results here and write only candidates the previous run did not")
+    generate.add_argument("--state-name", metavar="NAME", help="profile name in --state-dir (default: profile or output file name)")
+    generate.add_argument("--metrics", metavar="FILE", help="write per-stage sizes, duplicate ratios, timings and memory (Prometheus text for .prom, else JSON)")
+    generate.add_argument("--cprofile", action="store_true", help="with --metrics: add cProfile statistics of the run")
+    generate.add_argument("--tracemalloc", action="store_true", help="with --metrics: per-stage tracemalloc peaks and top allocation sites")
+    generate.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+    generate.set_defaults(func=cmd_generate)
+
+    estimate_cmd = commands.add_parser("estimate", help="predict output size and runtime without generating")
+    add_target_arguments(estimate_cmd)
+    add_settings_arguments(estimate_cmd)
+    estimate_cmd.set_defaults(func=cmd_estimate)
+
+    rules_cmd = commands.add_parser("rules", help="write a compact dictionary plus hashcat append rules")
+    add_target_arguments(rules_cmd)
+    add_settings_arguments(rules_cmd)
+    rules_cmd.add_argument("-d", "--output-dir", required=True, help="directory for the dictionary/rule pairs and manifest.json")
+    rules_cmd.add_argument("--verify", action="store_true", help="check the expansion matches the full wordlist")
+    rules_cmd.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+    rules_cmd.set_defaults(func=cmd_rules)
+
+    batch = commands.add_parser("batch", help="one wordlist per target in a JSONL or CSV file")
+    batch.add_argument("targets", help="JSONL (one profile object per line) or CSV with info fields as columns")
+    add_settings_arguments(batch)
+    batch.add_argument("-d", "--output-dir", default=".", help="directory for the per-target wordlists")
+    batch.add_argument("--compress", choices=sorted(EXTENSIONS), help="compress every wordlist")
+    batch.add_argument("-j", "--jobs", type=int, default=0, help="targets generated in parallel (0 = all cores)")
+    batch.add_argument("-q", "--quiet", action="store_true", help="no progress on stderr")
+    batch.set_defaults(func=cmd_batch)
+
+    index_cmd = commands.add_parser("index", help=f"build, query, merge and export sorted {INDEX_EXTENSION} wordlists")
+    actions = index_cmd.add_subparsers(dest="action", required=True)
+    build = actions.add_parser("build", help="sort and index wordlists into one file")
+    build.add_argument("inputs", nargs="+", help=f"text wordlists or {INDEX_EXTENSION} files")
+    add_index_arguments(build)
+    build.set_defaults(func=cmd_index_build)
+    lookup = actions.add_parser("lookup", help="check whether words are in an index (exit 1 if any is missing)")
+    lookup.add_argument("index", help=f"{INDEX_EXTENSION} file")
+    lookup.add_argument("words", nargs="+")
+    lookup.set_defaults(func=cmd_index_lookup)
+    union_cmd = actions.add_parser("union", help="words in any of the inputs")
+    union_cmd.add_argument("inputs", nargs="+", help=f"{INDEX_EXTENSION} files or text wordlists")
+    add_index_arguments(union_cmd)
+    union_cmd.set_defaults(func=cmd_index_union)
+    diff = actions.add_parser("diff", help="words in the first input and in none of the others")
+    diff.add_argument("first", help=f"{INDEX_EXTENSION} file or text wordlist")
+    diff.add_argument("others", nargs="+", help=f"{INDEX_EXTENSION} files or text wordlists")
+    add_index_arguments(diff)
+    diff.set_defaults(func=cmd_index_diff)
+    export = actions.add_parser("export", help="write an index back as plain text")
+    export.add_argument("index", help=f"{INDEX_EXTENSION} file")
+    export.add_argument("-o", "--output", default="-", help="output file (default: stdout; compressed by extension)")
+    export.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+    export.set_defaults(func=cmd_index_export)
+
+    bench = commands.add_parser("bench", help="time every stage on synthetic profiles for each toggle combination")
+    add_settings_arguments(bench)
+    bench.add_argument("--profiles", default="small,medium,large", help="comma separated: small, medium, large")
+    bench.add_argument("--repeat", type=int, default=1, help="runs per case; the fastest is kept")
+    bench.add_argument("-o", "--output", help="JSON results file (default: stdout)")
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError: # Downstream closed early, e.g. `| head`
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno()) # Silence the flush at exit
+        return 0
+    except (ImportError, OSError, ValueError) as e:
+        print(f"wordlistgen: error: {e}", file=sys.stderr)
+        return 1
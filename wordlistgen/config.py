@@ -0,0 +1,11 @@
+import datetime
+
+# --- Configuration (Shared by the Streamlit app and the engine) ---
+DEFAULT_OUTPUT_FILENAME_BASE = "wordlist"
+MIN_YEAR = 1900
+MAX_YEAR = datetime.datetime.now().year + 1
+NUMBERS_TO_APPEND_RANGE = (0, 99)
+COMMON_NUMBER_SEQUENCES = ["1", "12", "123", "1234", "12345", "7", "007"]
+LEET_TARGET_CHARS = 'aeiostlz'
+DEFAULT_SPECIAL_CHARS = "!@#$%^&*?_.-"
+MAX_SPECIAL_COMBO_LEN = 3
@@ -0,0 +1,87 @@
+"""Memoised date variations with an optional on-disk cache.
+
+Variations depend only on (year, month, day), so each distinct date is
+formatted once per process - or once ever, when the cache is persisted
+with ``save()`` and reloaded on the next run. Month names are looked up in a
+table built once instead of calling ``strftime`` per date.
+"""
+import datetime
+import json
+import os
+import tempfile
+
+# (full, abbreviated) lowercase month names, indexed by month number.
+MONTH_NAMES = [None] + [
+    (datetime.date(2000, m, 1).strftime("%B").lower(), datetime.date(2000, m, 1).strftime("%b").lower())
+    for m in range(1, 13)
+]
+
+
+def compute_date_variations(y, m, d):
+    """Formats one date every way the generator uses; returns a frozenset."""
+    yy = str(y)[-2:]
+    month_full, month_abbr = MONTH_NAMES[m]
+    return frozenset([
+        f"{d}{m}{y}", f"{d}{m}{yy}", f"{m}{d}{y}", f"{m}{d}{yy}",
+        f"{y}{m}{d}", f"{yy}{m}{d}", f"{d:02d}{m:02d}{y}", f"{d:02d}{m:02d}{yy}",
+        f"{m:02d}{d:02d}{y}", f"{m:02d}{d:02d}{yy}", f"{y}{m:02d}{d:02d}", f"{yy}{m:02d}{d:02d}",
+        f"{d}{m}", f"{m}{d}", f"{d:02d}{m:02d}", f"{m:02d}{d:02d}",
+        f"{m}{y}", f"{m}{yy}", f"{m:02d}{y}", f"{m:02d}{yy}",
+        f"{d}{y}", f"{d}{yy}", f"{d:02d}{y}", f"{d:02d}{yy}",
+        f"{y}", f"{yy}", f"{d}", f"{m}", f"{d:02d}", f"{m:02d}",
+        f"{d}{month_full}", f"{d:02d}{month_full}", f"{month_full}{d}", f"{month_full}{d:02d}",
+        f"{d}{month_abbr}", f"{d:02d}{month_abbr}", f"{month_abbr}{d}", f"{month_abbr}{d:02d}",
+        f"{month_full}{y}", f"{month_full}{yy}", f"{month_abbr}{y}", f"{month_abbr}{yy}",
+        f"{y}{month_full}", f"{yy}{month_full}", f"{y}{month_abbr}", f"{yy}{month_abbr}",
+    ])
+
+
+class DateVariationCache:
+    """Date variations keyed by ``(year, month, day)``; persists as JSON."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._table = {}
+        self._dirty = False
+        if path and os.path.exists(path): self.load(path)
+
+    def __len__(self):
+        return len(self._table)
+
+    def variations(self, date_obj):
+        key = (date_obj.year, date_obj.month, date_obj.day)
+        variations = self._table.get(key)
+        if variations is None:
+            variations = self._table[key] = compute_date_variations(*key)
+            self._dirty = True
+        return variations
+
+    def load(self, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        for date_str, variations in data.items():
+            y, m, d = (int(part) for part in date_str.split('-'))
+            self._table[(y, m, d)] = frozenset(variations)
+
+    def save(self, path=None):
+        """Writes the cache atomically to ``path`` (default: the load path) if it changed."""
+        path = path or self.path
+        if not path or not self._dirty: return
+        data = {f"{y:04d}-{m:02d}-{d:02d}": sorted(v) for (y, m, d), v in sorted(self._table.items())}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        self._dirty = False
+
+
+DEFAULT_DATE_CACHE = DateVariationCache()
+_PERSISTENT_CACHES = {}
+
+
+def get_date_cache(path=None):
+    """The process-wide cache, or the one backed by ``path`` (loaded once per process)."""
+    if not path: return DEFAULT_DATE_CACHE
+    path = os.path.abspath(path)
+    if path not in _PERSISTENT_CACHES: _PERSISTENT_CACHES[path] = DateVariationCache(path)
+    return _PERSISTENT_CACHES[path]
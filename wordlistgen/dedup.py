@@ -0,0 +1,148 @@
+"""Deduplication layer for the streaming pipeline.
+
+Every deduper exposes ``filter(words)``, a generator yielding each word the
+first time it is seen. They trade exactness against memory:
+
+* ``ExactDeduper`` - a plain ``set``; exact, memory grows with the output.
+* ``WindowDeduper`` - LRU window; bounded memory, repeats far apart slip through.
+* ``BloomDeduper`` - Bloom filter; fixed memory, drops a configurable fraction
+  of *unique* words as false positives, never lets a repeat through.
+* ``ExternalSortDeduper`` - sorted runs spilled to temp files and merged;
+  exact with bounded memory, but yields only at the end, in sorted order.
+"""
+import hashlib
+import heapq
+import math
+import os
+import tempfile
+from collections import OrderedDict
+
+
+class ExactDeduper:
+    """Exact deduplication with an in-memory set."""
+
+    def __init__(self):
+        self._seen = set()
+
+    def filter(self, words):
+        seen = self._seen
+        for word in words:
+            if word in seen: continue
+            seen.add(word)
+            yield word
+
+
+class WindowDeduper:
+    """Drops repeats seen among the last ``capacity`` distinct candidates.
+
+    Memory stays bounded, at the cost of letting through repeats that are
+    further apart than the window.
+    """
+
+    def __init__(self, capacity=1_000_000):
+        self.capacity = capacity
+        self._recent = OrderedDict()
+
+    def filter(self, words):
+        recent = self._recent
+        for word in words:
+            if word in recent:
+                recent.move_to_end(word)
+                continue
+            recent[word] = None
+            if len(recent) > self.capacity: recent.popitem(last=False)
+            yield word
+
+
+class BloomDeduper:
+    """Bloom filter sized for ``capacity`` words at ``error_rate`` false positives."""
+
+    def __init__(self, capacity=10_000_000, error_rate=0.001):
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, word):
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest.
+        digest = hashlib.blake2b(word.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, word):
+        """Adds ``word``; returns True if it was (probably) already present."""
+        bits = self._bits
+        present = True
+        for pos in self._positions(word):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        return present
+
+    def filter(self, words):
+        for word in words:
+            if not self.add(word): yield word
+
+
+class ExternalSortDeduper:
+    """Exact deduplication on a fixed memory budget via sorted temp-file runs.
+
+    Up to ``run_size`` distinct words are kept in memory; each full run is
+    sorted and written to ``tmp_dir``, and the runs are k-way merged once the
+    input is exhausted. Output is therefore sorted and only starts after the
+    whole input has been consumed.
+    """
+
+    def __init__(self, run_size=1_000_000, tmp_dir=None):
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+
+    def _spill(self, run, run_dir, index):
+        path = os.path.join(run_dir, f"run{index:05d}.txt")
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            f.writelines(word + "\n" for word in sorted(run))
+        return path
+
+    @staticmethod
+    def _read_run(f):
+        for line in f:
+            yield line[:-1]
+
+    def filter(self, words):
+        with tempfile.TemporaryDirectory(prefix="wordlist-runs-", dir=self.tmp_dir) as run_dir:
+            paths = []
+            run = set()
+            for word in words:
+                run.add(word)
+                if len(run) >= self.run_size:
+                    paths.append(self._spill(run, run_dir, len(paths)))
+                    run = set()
+            files = [open(path, encoding='utf-8', newline='\n') for path in paths]
+            try:
+                previous = None
+                for word in heapq.merge(sorted(run), *(self._read_run(f) for f in files)):
+                    if word != previous: yield word
+                    previous = word
+            finally:
+                for f in files: f.close()
+
+
+DEDUPERS = {
+    "exact": ExactDeduper,
+    "window": WindowDeduper,
+    "bloom": BloomDeduper,
+    "external": ExternalSortDeduper,
+}
+
+
+def make_deduper(kind, **options):
+    """Builds the deduper registered under ``kind`` (see ``DEDUPERS``)."""
+    try:
+        cls = DEDUPERS[kind]
+    except KeyError:
+        raise ValueError(f"Unknown dedup mode {kind!r}; expected one of {', '.join(DEDUPERS)}") from None
+    return cls(**options)
@@ -0,0 +1,457 @@
+"""UI-free wordlist generation pipeline.
+
+The Streamlit app, batch jobs and benchmarks all drive the same
+``WordlistEngine``; nothing in here imports Streamlit or sleeps.
+"""
+import datetime
+import itertools
+from dataclasses import dataclass, field
+
+from . import bulk
+from .config import (
+    COMMON_NUMBER_SEQUENCES,
+    DEFAULT_SPECIAL_CHARS,
+    MAX_SPECIAL_COMBO_LEN,
+    NUMBERS_TO_APPEND_RANGE,
+)
+from .dates import get_date_cache
+from .dedup import make_deduper
+from .estimate import plan_budget
+from .helpers import (
+    combine_elements,
+    generate_case_variations,
+    validate_date_str,
+)
+from .leet import DEFAULT_CACHE_VARIANTS, DEFAULT_MAX_LEET_REPLACEMENTS, LeetEngine
+from .parallel import PARTITIONED_DEDUP, partitioned_expand, sharded_expand
+from .ranking import ranked_candidates
+from .suffixes import SuffixIndex
+from .templates import parse_templates
+
+# Fields of the ``info`` dict holding single strings / lists of strings.
+STRING_FIELDS = [
+    'first_name', 'last_name', 'partner_first_name', 'partner_last_name',
+    'company_name', 'job_title', 'city', 'country', 'street_name',
+]
+LIST_FIELDS = [
+    'nicknames', 'partner_nicknames', 'children_names', 'children_nicknames',
+    'children_birth_dates_str', 'pet_names', 'interests', 'keywords',
+    'important_years', 'lucky_numbers',
+]
+DATE_FIELDS = ['birth_date', 'partner_birth_date', 'anniversary_date']
+
+
+@dataclass
+class GenerationSettings:
+    """Global settings: the sidebar values plus the augmentation toggles."""
+    min_len: int = 6
+    max_len: int = 16
+    special_chars: str = DEFAULT_SPECIAL_CHARS
+    years_range_enabled: bool = False
+    year_start: int = 1990
+    year_end: int = field(default_factory=lambda: datetime.datetime.now().year)
+    add_common_numbers: bool = False
+    use_special_chars: bool = False
+    enable_leet: bool = False
+    leet_map: dict = None # {char: [substitution, ...]}; None uses DEFAULT_LEET_MAP
+    max_leet_replacements: int = DEFAULT_MAX_LEET_REPLACEMENTS
+    leet_cache_size: int = DEFAULT_CACHE_VARIANTS # Cached leet variants, not entries
+    date_cache_path: str = None # JSON file persisting date variations between runs
+    max_candidates: int = None # Budget: prune stages (see estimate.py), then truncate
+    order: str = "stage" # "stage" (base, suffixes, leet) or "ranked" (see ranking.py)
+    templates: tuple = () # N-ary combination specs such as "{name}{keyword}{year}" (see templates.py)
+    dedup: str = "window" # exact, window, bloom or external (see dedup.py)
+    dedup_window: int = 1_000_000
+    bloom_capacity: int = 10_000_000
+    bloom_error_rate: float = 0.001
+    spill_run_size: int = 1_000_000
+    spill_dir: str = None
+    workers: int = 1 # Processes for suffixes/leetspeak; 0 uses every core
+    chunk_size: int = 2000 # Stems per worker task
+    backend: str = "python" # "numpy" builds the cross-products in bulk (see bulk.py)
+
+    @property
+    def unique_special_chars(self):
+        return sorted(set(c for c in self.special_chars if c))
+
+
+@dataclass(frozen=True)
+class SharedTables:
+    """Target-independent inputs, built once and reused across targets.
+
+    Holds the common-number suffixes, the special-char suffix combinations and
+    the configured year range; batch runs build one instance and hand it to
+    every engine.
+    """
+    key: tuple
+    common_numbers: frozenset
+    special_suffixes: frozenset
+    year_range: frozenset
+
+    @staticmethod
+    def key_for(settings):
+        return (settings.special_chars, settings.year_start, settings.year_end)
+
+    @classmethod
+    def build(cls, settings):
+        start, end = NUMBERS_TO_APPEND_RANGE
+        common_numbers = {str(i) for i in range(start, end + 1)}
+        common_numbers.update(COMMON_NUMBER_SEQUENCES)
+
+        unique_special_chars = settings.unique_special_chars
+        special_suffixes = set(unique_special_chars)
+        limit = min(MAX_SPECIAL_COMBO_LEN + 1, len(unique_special_chars) + 1)
+        for i in range(2, limit):
+            for combo_tuple in itertools.combinations(unique_special_chars, i):
+                special_suffixes.add("".join(combo_tuple))
+
+        year_range = set()
+        for y in range(settings.year_start, settings.year_end + 1):
+            year_range.add(str(y))
+            year_range.add(str(y)[-2:])
+        return cls(cls.key_for(settings), frozenset(common_numbers), frozenset(special_suffixes), frozenset(year_range))
+
+
+class WordlistEngine:
+    """Builds a wordlist for one target ``info`` dict.
+
+    ``progress`` is an optional ``callback(stage, percent, text)``; ``stage`` is
+    one of ``"status"``, ``"combinations"``, ``"suffixes"`` or ``"leetspeak"``
+    and ``percent`` is ``None`` for plain status messages. ``shared`` is an
+    optional prebuilt ``SharedTables``; it is ignored if it was built for a
+    different special-char set or year range.
+    """
+
+    def __init__(self, info, settings=None, progress=None, shared=None):
+        self.info = info
+        self.settings = settings or GenerationSettings()
+        self.progress = progress
+        s = self.settings
+        bulk.check_backend(s.backend)
+        if shared is None or shared.key != SharedTables.key_for(s): shared = SharedTables.build(s)
+        self.shared = shared
+        self.leet = LeetEngine(s.leet_map, s.max_leet_replacements, cache_size=s.leet_cache_size)
+        self.templates = parse_templates(s.templates)
+        self.estimate = None
+        self.pruned = []
+
+    def _report(self, stage, percent, text):
+        if self.progress: self.progress(stage, percent, text)
+
+    # --- Base words, dates and years ---
+
+    def string_collections(self):
+        info = self.info
+        return [
+            [info.get('first_name')], [info.get('last_name')], info.get('nicknames', []),
+            [info.get('partner_first_name')], [info.get('partner_last_name')], info.get('partner_nicknames', []),
+            info.get('children_names', []), info.get('children_nicknames', []),
+            info.get('pet_names', []), [info.get('company_name')], [info.get('job_title')],
+            [info.get('city')], [info.get('country')], [info.get('street_name')],
+            info.get('interests', []), info.get('keywords', [])
+        ]
+
+    def base_words(self):
+        """Case and reversed variations of every textual field."""
+        base_words = set()
+        for collection in self.string_collections():
+            if not collection: continue
+            for item in collection:
+                if not item: continue
+                item_str = str(item)
+                base_words.update(generate_case_variations(item_str))
+                if len(item_str) > 2:
+                    base_words.add(item_str[::-1].lower())
+                    base_words.add(item_str[::-1].capitalize())
+                base_words.add(item_str.lower())
+        return base_words
+
+    def all_dates(self):
+        """Date objects from the date fields plus valid children's birth dates."""
+        all_dates = [self.info.get(name) for name in DATE_FIELDS]
+        for date_str in self.info.get('children_birth_dates_str', []):
+            if validate_date_str(date_str):
+                try: all_dates.append(datetime.datetime.strptime(date_str, '%Y-%m-%d').date())
+                except ValueError: pass
+        return [d for d in all_dates if d]
+
+    def date_variations(self, all_dates):
+        cache = get_date_cache(self.settings.date_cache_path)
+        date_variations = set()
+        for date_obj in all_dates:
+            date_variations.update(cache.variations(date_obj))
+        cache.save()
+        return date_variations
+
+    def year_nums(self, all_dates):
+        """Four and two digit years from the dates, important years and the year range."""
+        s = self.settings
+        year_nums = set()
+        for date_obj in all_dates:
+            year_nums.add(str(date_obj.year))
+            year_nums.add(str(date_obj.year)[-2:])
+        year_nums.update(self.info.get('important_years', []))
+        if s.years_range_enabled:
+            year_nums.update(self.shared.year_range)
+        return year_nums
+
+    def numeric_affixes(self):
+        """Dates, years and lucky numbers as a list of stripped strings."""
+        all_dates = self.all_dates()
+        return self.merge_numeric(self.date_variations(all_dates), self.year_nums(all_dates))
+
+    def merge_numeric(self, date_variations, year_nums):
+        numeric_elements = list(date_variations) + list(year_nums) + self.info.get('lucky_numbers', [])
+        return list({str(n).strip() for n in numeric_elements if n})
+
+    # --- Combinations ---
+
+    def name_parts(self):
+        info = self.info
+        name_parts = []
+        if info.get('first_name'): name_parts.append(str(info['first_name']).lower())
+        if info.get('last_name'): name_parts.append(str(info['last_name']).lower())
+        name_parts.extend([str(n).lower() for n in info.get('nicknames', []) if n])
+        return name_parts
+
+    def interest_keywords(self):
+        interest_kws = [str(w).lower() for w in self.info.get('interests', []) if w]
+        interest_kws.extend([str(k).lower() for k in self.info.get('keywords', []) if k])
+        return interest_kws
+
+    def word_separators(self):
+        word_word_separators = ["", "_", "."]
+        if self.settings.use_special_chars:
+            word_word_separators.extend(self.settings.unique_special_chars)
+        return word_word_separators
+
+    def combine(self, label, list1, list2, separators=None):
+        """``combine_elements`` for one named pairing (overridden by ``metrics.InstrumentedEngine``)."""
+        if self.settings.backend == "numpy": return bulk.combine_elements(list1, list2, separators=separators)
+        return combine_elements(list1, list2, separators=separators)
+
+    def combinations(self, base_words, numeric_affixes):
+        """Base words, numeric elements and their pairwise combinations."""
+        info = self.info
+        final_wordlist = set(base_words)
+        final_wordlist.update(numeric_affixes)
+
+        core_strings = list({str(w).lower() for w in base_words if w})
+        final_wordlist.update(self.combine("core+numeric", core_strings, numeric_affixes, separators=[""]))
+        self._report("combinations", 33, "Combinations: Core + Numeric")
+
+        separators = self.word_separators()
+        name_parts = self.name_parts()
+        interest_kws = self.interest_keywords()
+        if name_parts and interest_kws:
+            final_wordlist.update(self.combine("names+interests", name_parts, interest_kws, separators=separators))
+        self._report("combinations", 66, "Combinations: Names + Interests")
+
+        if info.get('first_name') and info.get('last_name'):
+            final_wordlist.update(self.combine("first+last", [str(info['first_name']).lower()], [str(info['last_name']).lower()], separators=separators))
+        self._report("combinations", 100, "Combinations: Complete!")
+        return final_wordlist
+
+    # --- Templates ---
+
+    def template_values(self):
+        """Element sets for the template slots (see ``templates.SLOTS``)."""
+        info, s = self.info, self.settings
+        def lower(*collections): return {str(v).strip().lower() for c in collections for v in c if v}
+        all_dates = self.all_dates()
+        numbers = {str(n).strip() for n in info.get('lucky_numbers', []) if n}
+        if s.add_common_numbers: numbers.update(self.shared.common_numbers)
+        return {
+            "name": set(self.name_parts()),
+            "first": lower([info.get('first_name')]),
+            "last": lower([info.get('last_name')]),
+            "partner": lower([info.get('partner_first_name'), info.get('partner_last_name')], info.get('partner_nicknames', [])),
+            "child": lower(info.get('children_names', []), info.get('children_nicknames', [])),
+            "pet": lower(info.get('pet_names', [])),
+            "keyword": set(self.interest_keywords()),
+            "place": lower([info.get('city'), info.get('country'), info.get('street_name')]),
+            "work": lower([info.get('company_name'), info.get('job_title')]),
+            "word": {w.lower() for w in self.base_words()},
+            "date": self.date_variations(all_dates),
+            "year": self.year_nums(all_dates),
+            "number": numbers,
+            "special": set(s.unique_special_chars),
+            "sep": set(self.word_separators()),
+        }
+
+    def iter_templates(self, values=None, old_values=None):
+        """Lazily yields the words of every template within ``min_len``..``max_len``."""
+        s = self.settings
+        if values is None: values = self.template_values()
+        for template in self.templates:
+            yield from template.expand(values, s.max_len, s.min_len, old_values)
+
+    def _ordered(self, variants):
+        """``variants`` sorted when the output may be truncated, so the cut is the same every run."""
+        return sorted(variants) if self.settings.max_candidates else variants
+
+    def template_leet(self, words):
+        """Yields the leetspeak variants of template words."""
+        s = self.settings
+        for word in words:
+            for leet_word in self._ordered(self.leet.suffixed_variants(word)):
+                if s.min_len <= len(leet_word) <= s.max_len: yield leet_word
+
+    # --- Suffixes and leetspeak ---
+
+    def suffixes(self, numeric_affixes):
+        """All suffixes to append, indexed by length."""
+        suffixes_to_add = set()
+        if self.settings.add_common_numbers:
+            suffixes_to_add.update(self.shared.common_numbers)
+        if self.settings.use_special_chars:
+            suffixes_to_add.update(self.shared.special_suffixes)
+        suffixes_to_add.update(numeric_affixes)
+        return SuffixIndex(suffixes_to_add, self.settings.max_len)
+
+    def iter_suffixed(self, stems, suffixes):
+        """Yields ``stem + suffix`` for every pair that lands within ``min_len``..``max_len``."""
+        min_len = self.settings.min_len
+        total = len(stems)
+        for i, word in enumerate(stems):
+            yield from suffixes.append_to(word, min_len)
+            if i % 1000 == 0 or i == total - 1:
+                percentage = int(((i + 1) / total) * 100)
+                self._report("suffixes", percentage, f"Suffixes: Processing {i+1}/{total} ({percentage}%)")
+
+    def iter_leet(self, stems, suffixes):
+        """Yields the leetspeak variants of every stem and suffixed stem."""
+        max_len = self.settings.max_len
+        total = len(stems)
+        for i, word in enumerate(stems):
+            for suffix in itertools.chain([""], suffixes.fitting(len(word))):
+                for leet_word in self._ordered(self.leet.suffixed_variants(word, suffix)):
+                    if len(leet_word) <= max_len: yield leet_word
+            if i % 1000 == 0 or i == total - 1:
+                percentage = int(((i + 1) / total) * 100)
+                self._report("leetspeak", percentage, f"Leetspeak: Processing {i+1}/{total} ({percentage}%)")
+
+    def expand_stage(self, stage, stems, suffixes):
+        """Runs the suffix or leetspeak stage in-process or sharded across workers."""
+        s = self.settings
+        if s.workers == 1 or len(stems) <= s.chunk_size:
+            if stage == "suffixes": yield from self.iter_suffixed(stems, suffixes)
+            else: yield from (w for w in self.iter_leet(stems, suffixes) if len(w) >= s.min_len)
+            return
+
+        label = stage.capitalize()
+        def report(done, total):
+            percentage = int(done / total * 100)
+            self._report(stage, percentage, f"{label}: Processing {done}/{total} ({percentage}%)")
+        yield from sharded_expand(stage, stems, suffixes, s, workers=s.workers, chunk_size=s.chunk_size, progress=report)
+
+    # --- Full pipeline ---
+
+    def candidates(self):
+        """Lazily yields every candidate in ``settings.order``, already length-filtered.
+
+        The same word may be yielded more than once.
+        """
+        if self.settings.max_candidates and self.estimate is None: self.apply_budget()
+        if self.settings.order == "ranked": return ranked_candidates(self)
+        return self.staged_candidates()
+
+    def staged_candidates(self):
+        """Yields every candidate stage by stage.
+
+        Only the stem set (base words, numeric elements and combinations) is
+        held in memory; suffixed and leetspeak variants are produced on the
+        fly.
+        """
+        s = self.settings
+        self._report("status", None, "Processing base words and dates...")
+        base_words = self.base_words()
+        numeric_affixes = self.numeric_affixes()
+
+        self._report("status", None, "Generating combinations...")
+        stems = sorted(w for w in self.combinations(base_words, numeric_affixes) if len(w) <= s.max_len) # Reproducible truncation
+        suffixes = self.suffixes(numeric_affixes)
+        yield from (w for w in stems if len(w) >= s.min_len)
+        if self.templates:
+            self._report("status", None, "Expanding templates...")
+            yield from self.iter_templates()
+
+        self._report("status", None, "Applying suffixes...")
+        if suffixes:
+            yield from self.expand_stage("suffixes", stems, suffixes)
+        self._report("suffixes", 100, "Suffixes: Complete!")
+
+        if s.enable_leet:
+            self._report("status", None, "Applying leetspeak...")
+            yield from self.expand_stage("leetspeak", stems, suffixes)
+            if self.templates: yield from self.template_leet(self.iter_templates())
+            self._report("leetspeak", 100, "Leetspeak: Complete!")
+        else:
+            self._report("leetspeak", 100, "Leetspeak: Skipped")
+
+    def deduper(self):
+        """Builds the deduper selected by ``settings.dedup``."""
+        s = self.settings
+        options = {
+            "exact": {},
+            "window": {"capacity": s.dedup_window},
+            "bloom": {"capacity": s.bloom_capacity, "error_rate": s.bloom_error_rate},
+            "external": {"run_size": s.spill_run_size, "tmp_dir": s.spill_dir},
+        }.get(s.dedup, {})
+        return make_deduper(s.dedup, **options)
+
+    def apply_budget(self):
+        """Prunes the settings to fit ``max_candidates`` and records the estimate."""
+        settings, self.estimate, self.pruned = plan_budget(self)
+        if settings.max_leet_replacements != self.settings.max_leet_replacements:
+            self.leet = LeetEngine(settings.leet_map, settings.max_leet_replacements, cache_size=settings.leet_cache_size)
+        self.settings = settings
+        return self.estimate
+
+    def stream(self):
+        """Yields candidates with repeats dropped by the configured deduper."""
+        words = self.deduper().filter(self.candidates())
+        if self.settings.max_candidates: words = itertools.islice(words, self.settings.max_candidates)
+        return words
+
+    def partitioned_buffers(self):
+        """Stage-order output deduplicated inside the worker pool, as ``(buffer, lines)`` blocks.
+
+        Every candidate goes through ``parallel.partitioned_expand`` instead
+        of the parent's deduper, so dedup is always exact (which also meets
+        ``window``), memory per worker is bounded by ``spill_run_size`` (as
+        with ``external``) and the output comes partition by partition rather
+        than in stage order. Needs ``settings.workers != 1``;
+        ``max_candidates`` is not applied and ``bloom`` dedup is rejected.
+        """
+        s = self.settings
+        if s.dedup not in PARTITIONED_DEDUP:
+            raise ValueError(f"Partitioned output supports --dedup {', '.join(PARTITIONED_DEDUP)}, not {s.dedup!r}")
+        self._report("status", None, "Processing base words and dates...")
+        base_words = self.base_words()
+        numeric_affixes = self.numeric_affixes()
+        self._report("status", None, "Generating combinations...")
+        stems = sorted(w for w in self.combinations(base_words, numeric_affixes) if len(w) <= s.max_len) # Reproducible truncation
+        suffixes = self.suffixes(numeric_affixes)
+        words = itertools.chain((w for w in stems if len(w) >= s.min_len), self.iter_templates() if self.templates else ())
+        if s.enable_leet and self.templates: words = itertools.chain(words, self.template_leet(self.iter_templates()))
+        stages = (["suffixes"] if suffixes else []) + (["leetspeak"] if s.enable_leet else [])
+
+        def report(done, total):
+            percentage = int(done / total * 100)
+            for stage in stages: self._report(stage, percentage, f"{stage.capitalize()}: Processing {done}/{total} ({percentage}%)")
+        self._report("status", None, "Expanding and deduplicating in workers...")
+        yield from partitioned_expand(words, stages, stems, suffixes, s, workers=s.workers, chunk_size=s.chunk_size,
+                                      tmp_dir=s.spill_dir, progress=report)
+        self._report("suffixes", 100, "Suffixes: Complete!")
+        self._report("leetspeak", 100, "Leetspeak: Complete!" if s.enable_leet else "Leetspeak: Skipped")
+
+    def generate(self):
+        """Runs every stage and returns the length-filtered set of candidates."""
+        limit = self.settings.max_candidates
+        if not limit: return set(self.candidates())
+        result = set()
+        for word in self.candidates():
+            result.add(word)
+            if len(result) >= limit: break
+        return result
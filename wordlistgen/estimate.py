@@ -0,0 +1,170 @@
+"""Analytical candidate-count estimates and ``max_candidates`` budget planning.
+
+Nothing here enumerates combinations. Each input set is summarised as a
+histogram keyed by ``(length, leet_counts)``, where ``leet_counts[j]`` is the
+number of ways to make exactly ``j`` leet substitutions in a string.
+Concatenation becomes a convolution of histograms (lengths add and the leet
+counts multiply as polynomials), so the combination, suffix and leetspeak
+stages can be counted from the cardinalities of core strings, numeric
+affixes, separators and suffixes alone.
+
+Counts are before deduplication, so they are upper bounds. Overlap between
+stages is usually small (a few percent).
+"""
+import dataclasses
+from collections import Counter
+
+# Rough single-core throughput (candidates/s) per stage, from `bench` runs.
+STAGE_RATES = {"stems": 1_000_000, "suffixes": 3_000_000, "leetspeak": 1_500_000, "output": 1_000_000}
+
+
+@dataclasses.dataclass
+class Estimate:
+    stems: int
+    suffixed: int
+    leet: int
+    seconds: float
+    templates: int = 0
+
+    @property
+    def total(self):
+        return self.stems + self.suffixed + self.leet + self.templates
+
+    def as_dict(self):
+        return dict(dataclasses.asdict(self), total=self.total)
+
+
+def _poly_mul(a, b, limit):
+    out = [0] * min(len(a) + len(b) - 1, limit + 1)
+    for i, x in enumerate(a):
+        if not x: continue
+        for j, y in enumerate(b[:limit + 1 - i]):
+            out[i + j] += x * y
+    return tuple(out)
+
+
+def leet_counts(text, table, limit):
+    """``counts[j]``: ways to substitute exactly ``j`` characters of ``text``."""
+    counts = (1,)
+    for char in text:
+        subs = table.get(char.lower())
+        if subs: counts = _poly_mul(counts, (1, len(subs)), limit)
+    return counts
+
+
+def histogram(strings, table, limit):
+    return Counter((len(s), leet_counts(s, table, limit)) for s in strings if s)
+
+
+def convolve(*histograms, limit, max_len):
+    """Histogram of every concatenation, dropping keys longer than ``max_len``."""
+    result = Counter({(0, (1,)): 1})
+    for hist in histograms:
+        grown = Counter()
+        for (len_a, poly_a), count_a in result.items():
+            for (len_b, poly_b), count_b in hist.items():
+                if len_a + len_b <= max_len:
+                    grown[(len_a + len_b, _poly_mul(poly_a, poly_b, limit))] += count_a * count_b
+        result = grown
+    return result
+
+
+def stem_histogram(engine):
+    """Histogram of the stem set (base words, numeric elements, combinations)."""
+    s = engine.settings
+    table, limit = engine.leet.table, engine.leet.max_replacements
+    def hist(strings): return histogram(strings, table, limit)
+    def conv(*hs): return convolve(*hs, limit=limit, max_len=s.max_len)
+
+    base_words = engine.base_words()
+    numeric = hist(engine.numeric_affixes())
+    stems = hist(base_words) + numeric
+    core = hist({w.lower() for w in base_words})
+    for _ in range(2): stems.update(conv(core, numeric)) # Both orders
+    separators = hist(engine.word_separators()) + Counter({(0, (1,)): 1}) # "" is always a separator
+    names, interests = hist(engine.name_parts()), hist(engine.interest_keywords())
+    first, last = engine.info.get('first_name'), engine.info.get('last_name')
+    pairs = [(names, interests)]
+    if first and last: pairs.append((hist([str(first).lower()]), hist([str(last).lower()])))
+    for a, b in pairs:
+        for _ in range(2): stems.update(conv(a, separators, b))
+    return Counter({key: n for key, n in stems.items() if key[0] <= s.max_len})
+
+
+def template_histogram(engine):
+    """Histogram of the template words; each template is a convolution of its parts."""
+    s = engine.settings
+    table, limit = engine.leet.table, engine.leet.max_replacements
+    values = engine.template_values()
+    result = Counter()
+    for template in engine.templates:
+        parts = []
+        for choice in template.choices(values):
+            hist = histogram(choice, table, limit)
+            if "" in choice: hist[(0, (1,))] += 1 # Optional slot
+            parts.append(hist)
+        result.update(convolve(*parts, limit=limit, max_len=s.max_len))
+    return result
+
+
+def estimate(engine, rates=STAGE_RATES):
+    """Predicts candidate counts per stage and a rough single-core runtime."""
+    s = engine.settings
+    table, limit = engine.leet.table, engine.leet.max_replacements
+    stems_hist = stem_histogram(engine)
+    suffixes = engine.suffixes(engine.numeric_affixes())
+    suffix_hist = histogram(suffixes, table, limit)
+
+    stems = sum(n for (length, _), n in stems_hist.items() if length >= s.min_len)
+    suffixed = sum(n * suffixes.count_between(length, s.min_len) for (length, _), n in stems_hist.items())
+    leet = 0
+    if s.enable_leet:
+        tails = suffix_hist + Counter({(0, (1,)): 1}) # The bare stem is leeted too
+        for (length, poly), n in stems_hist.items():
+            for (tail_len, tail_poly), m in tails.items():
+                if not s.min_len <= length + tail_len <= s.max_len: continue
+                leet += n * m * (sum(_poly_mul(poly, tail_poly, limit)) - 1)
+
+    templates = 0
+    if engine.templates:
+        for (length, poly), n in template_histogram(engine).items():
+            if length < s.min_len: continue
+            templates += n
+            if s.enable_leet: leet += n * (sum(poly) - 1)
+
+    seconds = ((stems + templates) / rates["stems"] + suffixed / rates["suffixes"] + leet / rates["leetspeak"]
+               + (stems + suffixed + leet + templates) / rates["output"])
+    return Estimate(stems, suffixed, leet, round(seconds, 2), templates)
+
+
+# Applied in order until the estimate fits the budget.
+PRUNING_STEPS = [
+    ("fewer leet replacements", lambda s: s.enable_leet and s.max_leet_replacements > 1,
+     lambda s: dataclasses.replace(s, max_leet_replacements=s.max_leet_replacements - 1)),
+    ("leetspeak off", lambda s: s.enable_leet, lambda s: dataclasses.replace(s, enable_leet=False)),
+    ("special chars off", lambda s: s.use_special_chars, lambda s: dataclasses.replace(s, use_special_chars=False)),
+    ("common numbers off", lambda s: s.add_common_numbers, lambda s: dataclasses.replace(s, add_common_numbers=False)),
+    ("year range off", lambda s: s.years_range_enabled, lambda s: dataclasses.replace(s, years_range_enabled=False)),
+]
+
+
+def plan_budget(engine):
+    """Prunes ``engine.settings`` until the estimate fits ``max_candidates``.
+
+    Returns ``(settings, estimate, pruned)`` where ``pruned`` lists the steps
+    taken. If everything is pruned and the estimate is still over budget the
+    stream is truncated; earlier stages are emitted first, so truncation
+    keeps base words and combinations over suffixed and leet variants.
+    Ranked output is never pruned: truncating it already keeps the likeliest
+    candidates.
+    """
+    settings = engine.settings
+    budget = settings.max_candidates if settings.order != "ranked" else None
+    result = estimate(engine)
+    pruned = []
+    for description, applies, prune in PRUNING_STEPS:
+        while budget and result.total > budget and applies(settings):
+            settings = prune(settings)
+            result = estimate(type(engine)(engine.info, settings, shared=engine.shared))
+            pruned.append(description)
+    return settings, result, pruned
@@ -0,0 +1,96 @@
+import datetime
+import re
+
+from .config import DEFAULT_OUTPUT_FILENAME_BASE, MIN_YEAR, MAX_YEAR
+from .dates import DEFAULT_DATE_CACHE
+from .leet import DEFAULT_MAX_LEET_REPLACEMENTS, LeetEngine
+
+DEFAULT_LEET_ENGINE = LeetEngine()
+
+# --- Helper Functions (Shared by the Streamlit app and the engine) ---
+
+def validate_date_str(date_str):
+    """Validates YYYY-MM-DD format string."""
+    if not date_str: return True # Allow empty
+    try:
+        date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+        year = date_obj.year
+        if not MIN_YEAR <= year <= MAX_YEAR:
+             return False
+        return True
+    except (ValueError, IndexError):
+        return False
+
+def validate_year_str(year_str):
+    """Validates a 4-digit year string."""
+    if not year_str: return True # Allow empty
+    if not year_str.isdigit() or len(year_str) != 4:
+        return False
+    year = int(year_str)
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        return False
+    return True
+
+def parse_list_input(text_area_content):
+    """Parses comma or newline separated input from text_area."""
+    if not text_area_content:
+        return []
+    # Split by comma or newline, strip whitespace, filter empty strings
+    items = re.split(r'[,\n]', text_area_content)
+    return [item.strip() for item in items if item.strip()]
+
+def output_filename(first_name):
+    """Download/output file name derived from the target's first name."""
+    if not first_name: return f"{DEFAULT_OUTPUT_FILENAME_BASE}.txt"
+    sanitized_name = re.sub(r'[\\/*?:"<>| ]', '_', str(first_name).lower().strip())
+    if not sanitized_name: sanitized_name = DEFAULT_OUTPUT_FILENAME_BASE
+    return f"{sanitized_name}_wordlist.txt"
+
+def generate_date_variations(date_obj):
+    """Generates various formats from a date or datetime object."""
+    if not date_obj: return []
+    return list(DEFAULT_DATE_CACHE.variations(date_obj))
+
+def generate_case_variations(word):
+    if not word: return []
+    word_str = str(word)
+    return list(set([word_str.lower(), word_str.upper(), word_str.capitalize()]))
+
+def apply_leet_speak(word, leet_map=None, max_leet_replacements=DEFAULT_MAX_LEET_REPLACEMENTS):
+    if not word: return []
+    if leet_map is None and max_leet_replacements == DEFAULT_MAX_LEET_REPLACEMENTS: leet = DEFAULT_LEET_ENGINE
+    else: leet = LeetEngine(leet_map, max_leet_replacements)
+    return list(leet.variants(str(word)))
+
+def add_affixes(word, prefixes=None, suffixes=None):
+    if not word: return []
+    word_str = str(word)
+    variations = {word_str}
+    if prefixes:
+        for prefix in prefixes:
+             prefix_str = str(prefix)
+             if prefix_str: variations.add(prefix_str + word_str)
+    if suffixes:
+        for suffix in suffixes:
+            suffix_str = str(suffix)
+            if suffix_str: variations.add(word_str + suffix_str)
+    return list(variations)
+
+def combine_elements(list1, list2, separators=None):
+    combinations = set()
+    if not list1 or not list2: return []
+    separators = list(separators) if separators else [""]
+    if not separators: separators = [""]
+    for item1 in list1:
+        item1_str = str(item1).strip()
+        if not item1_str: continue
+        for item2 in list2:
+            item2_str = str(item2).strip()
+            if not item2_str: continue
+            if item1_str == item2_str and "" in separators: continue
+            for sep in separators:
+                sep_str = str(sep)
+                combinations.add(item1_str + sep_str + item2_str)
+                if item1_str != item2_str or sep_str != "":
+                    combinations.add(item2_str + sep_str + item1_str)
+    return list(combinations)
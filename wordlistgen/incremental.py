@@ -0,0 +1,287 @@
+"""Incremental regeneration: emit only what an edited profile adds.
+
+A ``ProfileState`` keeps the stage outputs of the last run for a profile:
+base words, numeric elements, the combination inputs, the stem set (base
+words, numeric elements and combinations), the suffix set and the template
+slot values. On the next
+run the combinations are rebuilt from the new inputs crossed with the
+existing ones, and only the new pairs are expanded: new stems against every
+suffix, old stems against new suffixes, and template words using a new slot
+value. Candidates the previous run could already produce are dropped by
+splitting them back into an old stem and an old suffix (or matching them
+against the old template words), so the output is an append-only diff of the
+previous wordlist.
+
+Removing a field is fine too (the stems are then rebuilt in full) but the
+diff never retracts words. States are only compared under the same output
+settings; anything else starts from scratch.
+"""
+import dataclasses
+import itertools
+import json
+import os
+import re
+import tempfile
+
+from .helpers import combine_elements
+from .suffixes import SuffixIndex
+
+# Settings that change the output; the rest only change how it is produced.
+OUTPUT_SETTINGS = (
+    'min_len', 'max_len', 'special_chars', 'years_range_enabled', 'year_start', 'year_end',
+    'add_common_numbers', 'use_special_chars', 'enable_leet', 'leet_map', 'max_leet_replacements', 'templates',
+)
+SET_FIELDS = ('base_words', 'numeric', 'name_parts', 'interests', 'stems', 'suffixes')
+
+
+def settings_key(settings):
+    return json.dumps({name: getattr(settings, name) for name in OUTPUT_SETTINGS}, sort_keys=True)
+
+
+def full_name(info):
+    first, last = info.get('first_name'), info.get('last_name')
+    return (str(first).lower(), str(last).lower()) if first and last else ()
+
+
+@dataclasses.dataclass(frozen=True)
+class ProfileState:
+    key: str
+    base_words: frozenset
+    numeric: frozenset
+    name_parts: frozenset
+    interests: frozenset
+    full_name: tuple
+    stems: frozenset # Combination stage output, at most max_len long
+    suffixes: frozenset
+    template_values: dict = dataclasses.field(default_factory=dict) # {slot: frozenset}
+
+    def grows_into(self, inputs):
+        """True if every combination input of ``self`` is still in ``inputs``."""
+        return (all(getattr(self, name) <= inputs[name] for name in ('base_words', 'numeric', 'name_parts', 'interests'))
+                and self.full_name in ((), inputs['full_name']))
+
+    def as_dict(self):
+        data = {name: sorted(getattr(self, name)) for name in SET_FIELDS}
+        template_values = {slot: sorted(values) for slot, values in self.template_values.items()}
+        return dict(data, key=self.key, full_name=list(self.full_name), template_values=template_values)
+
+    @classmethod
+    def from_dict(cls, data):
+        sets = {name: frozenset(data[name]) for name in SET_FIELDS}
+        template_values = {slot: frozenset(values) for slot, values in data.get('template_values', {}).items()}
+        return cls(key=data['key'], full_name=tuple(data['full_name']), template_values=template_values, **sets)
+
+
+def _delta_stems(engine, previous, inputs):
+    """Stems for ``inputs`` given they only add to ``previous``: new elements
+    crossed with every existing one, merged into the previous stems."""
+    s = engine.settings
+    separators = engine.word_separators()
+    combos = set(inputs['base_words'] - previous.base_words) | (inputs['numeric'] - previous.numeric)
+
+    old_core = {w.lower() for w in previous.base_words}
+    new_core = {w.lower() for w in inputs['base_words']} - old_core
+    new_numeric = inputs['numeric'] - previous.numeric
+    combos.update(combine_elements(new_core, inputs['numeric'], separators=[""]))
+    combos.update(combine_elements(old_core, new_numeric, separators=[""]))
+
+    new_names = inputs['name_parts'] - previous.name_parts
+    new_interests = inputs['interests'] - previous.interests
+    combos.update(combine_elements(new_names, inputs['interests'], separators=separators))
+    combos.update(combine_elements(previous.name_parts, new_interests, separators=separators))
+
+    if inputs['full_name'] and inputs['full_name'] != previous.full_name:
+        first, last = inputs['full_name']
+        combos.update(combine_elements([first], [last], separators=separators))
+    return previous.stems | {w for w in combos if len(w) <= s.max_len}
+
+
+def capture_state(engine, previous=None):
+    """Runs the stem stages for ``engine``, reusing ``previous`` where possible."""
+    s = engine.settings
+    numeric = engine.numeric_affixes()
+    inputs = {
+        'base_words': frozenset(engine.base_words()), 'numeric': frozenset(numeric),
+        'name_parts': frozenset(engine.name_parts()), 'interests': frozenset(engine.interest_keywords()),
+        'full_name': full_name(engine.info),
+    }
+    if previous is not None and previous.grows_into(inputs):
+        stems = _delta_stems(engine, previous, inputs)
+    else:
+        stems = frozenset(w for w in engine.combinations(inputs['base_words'], numeric) if len(w) <= s.max_len)
+    template_values = {slot: frozenset(values) for slot, values in engine.template_values().items()} if engine.templates else {}
+    return ProfileState(key=settings_key(s), stems=stems, suffixes=frozenset(engine.suffixes(numeric)),
+                        template_values=template_values, **inputs)
+
+
+class PreviousOutput:
+    """Membership test for the wordlist a ``ProfileState`` produced.
+
+    Plain and suffixed words are split at every position into a stem and a
+    suffix. Leetspeak words are matched against stems and suffixes with the
+    same leet skeleton (each character folded to its substitution class), then
+    checked position by position; template words are matched slot by slot
+    the same way. Leet maps with multi-character substitutions cannot be
+    aligned like this; their leet words are never reported as previous, so a
+    few may be emitted again.
+    """
+
+    def __init__(self, state, engine):
+        s = engine.settings
+        self.state = state
+        self.min_len, self.max_len = s.min_len, s.max_len
+        self.table, self.max_replacements = engine.leet.table, engine.leet.max_replacements
+        self.leet = s.enable_leet and all(len(sub) == 1 for subs in self.table.values() for sub in subs)
+        self.fold = str.maketrans(self._fold_table()) if self.leet else {}
+        self.stem_index = self._index(state.stems)
+        self.suffix_index = self._index(itertools.chain([""], state.suffixes))
+        self.stem_prefixes = {key[:i] for key in self.stem_index for i in range(1, len(key))}
+        self.suffix_prefixes = {key[:i] for key in self.suffix_index for i in range(len(key) + 1)}
+        self.template_matchers = [t.matcher(state.template_values, self.fold) for t in engine.templates] if state.template_values else []
+
+    def _fold_table(self):
+        """Maps every leet source and substitution to one representative per class."""
+        parent = {}
+        def find(c):
+            while parent.get(c, c) != c: c = parent[c]
+            return c
+        for char, subs in self.table.items():
+            for sub in subs: parent[find(sub)] = find(char)
+        chars = set(parent) | set(self.table) | {c.upper() for c in self.table}
+        return {c: find(c.lower() if c.lower() in self.table else c) for c in chars}
+
+    def _index(self, strings):
+        index = {}
+        for text in strings: index.setdefault(text.translate(self.fold), []).append(text)
+        return index
+
+    def may_extend(self, stem):
+        """False if no candidate built on ``stem`` can be in the previous output.
+
+        Every previous candidate splits into an old stem and an old suffix, so
+        ``stem`` must either be the start of an old stem or be an old stem
+        followed by the start of an old suffix (comparing skeletons, which
+        covers the leetspeak variants too).
+        """
+        key = stem.translate(self.fold)
+        if key in self.stem_prefixes: return True
+        return any(key[:i] in self.stem_index and key[i:] in self.suffix_prefixes for i in range(1, len(key) + 1))
+
+    def _is_variant(self, word, base):
+        changed = 0
+        for char, original in zip(word, base):
+            if char != original:
+                if char not in self.table.get(original.lower(), ()): return False
+                changed += 1
+        return 0 < changed <= self.max_replacements
+
+    def _is_leet(self, word):
+        key = word.translate(self.fold)
+        for i in range(1, len(word) + 1):
+            heads = self.stem_index.get(key[:i])
+            tails = heads and self.suffix_index.get(key[i:])
+            if not tails: continue
+            for head in heads:
+                if any(self._is_variant(word, head + tail) for tail in tails): return True
+        return False
+
+    def in_templates(self, word):
+        """True if ``word`` is a previous template word or one of its leet variants."""
+        for match in self.template_matchers:
+            for base in match(word):
+                if base == word or (self.leet and self._is_variant(word, base)): return True
+        return False
+
+    def __contains__(self, word):
+        if not self.min_len <= len(word) <= self.max_len: return False
+        stems, suffixes = self.state.stems, self.state.suffixes
+        if word in stems: return True
+        if any(word[:i] in stems and word[i:] in suffixes for i in range(1, len(word))): return True
+        return (self.leet and self._is_leet(word)) or self.in_templates(word)
+
+
+def diff_candidates(engine, previous, state):
+    """Yields the candidates of ``state`` that ``previous`` could not produce.
+
+    Only pairs involving a new stem or a new suffix, and template words using
+    a new slot value, are expanded. Words built on stems that overlap no old
+    stem are only checked against the old template words. The result may
+    repeat words and is not ranked.
+    """
+    s = engine.settings
+    seen = PreviousOutput(previous, engine)
+    added = [w for w in state.stems if w not in previous.stems]
+    kept = [w for w in state.stems if w in previous.stems]
+    fresh = [w for w in added if not seen.may_extend(w)]
+    overlapping = [w for w in added if seen.may_extend(w)]
+    suffixes = SuffixIndex(state.suffixes, s.max_len)
+    new_suffixes = SuffixIndex(state.suffixes - previous.suffixes, s.max_len)
+
+    def new_leet(stems, suffixes):
+        return engine.expand_stage("leetspeak", stems, suffixes) if s.enable_leet else ()
+
+    unchecked = [
+        (w for w in fresh if len(w) >= s.min_len),
+        engine.expand_stage("suffixes", fresh, suffixes),
+        new_leet(fresh, suffixes),
+    ]
+    for words in unchecked:
+        if seen.template_matchers: words = (w for w in words if not seen.in_templates(w))
+        yield from words
+
+    checked = [
+        (w for w in overlapping if len(w) >= s.min_len),
+        engine.expand_stage("suffixes", overlapping, suffixes),
+        new_leet(overlapping, suffixes),
+        engine.expand_stage("suffixes", kept, new_suffixes),
+    ]
+    if s.enable_leet:
+        checked.append(w for stem in kept for suffix in new_suffixes.fitting(len(stem), s.min_len)
+                       for w in engine.leet.suffixed_variants(stem, suffix) if s.min_len <= len(w) <= s.max_len)
+    if engine.templates:
+        def new_template_words(): return engine.iter_templates(state.template_values, previous.template_values)
+        checked.append(new_template_words())
+        if s.enable_leet: checked.append(engine.template_leet(new_template_words()))
+    for words in checked:
+        yield from (w for w in words if w not in seen)
+
+
+def incremental_stream(engine, previous=None):
+    """Returns ``(words, state)``: the deduplicated candidates ``previous``
+    did not produce, and the state to keep for the next run.
+
+    Without a usable ``previous`` (none, or other output settings) every
+    candidate is new and ``words`` is ``engine.stream()``.
+    """
+    if engine.settings.max_candidates and engine.estimate is None: engine.apply_budget()
+    if previous is not None and previous.key != settings_key(engine.settings): previous = None
+    state = capture_state(engine, previous)
+    if previous is None: return engine.stream(), state
+    words = engine.deduper().filter(diff_candidates(engine, previous, state))
+    if engine.settings.max_candidates: words = itertools.islice(words, engine.settings.max_candidates)
+    return words, state
+
+
+class StateStore:
+    """One JSON ``ProfileState`` file per profile name in ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, name):
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', name) + ".json")
+
+    def load(self, name):
+        try:
+            with open(self.path(name), encoding='utf-8') as f:
+                return ProfileState.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def save(self, name, state):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state.as_dict(), f)
+        os.replace(tmp_path, path)
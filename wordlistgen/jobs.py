@@ -0,0 +1,109 @@
+"""Background generation jobs for interactive front ends.
+
+A ``GenerationJob`` runs a word stream to a file on a daemon thread, so it
+keeps going while the caller returns (a Streamlit script finishes and reruns
+on every widget interaction). The caller polls ``status()`` for live
+counts, throughput, per-stage progress and a sample of recent candidates,
+and may ``cancel()`` at any time; the job stops after the current batch.
+"""
+import collections
+import dataclasses
+import os
+import threading
+import time
+from itertools import islice
+
+from .sinks import FileSink
+
+JOB_BATCH = 8192 # Words per write; also how often cancellation is checked
+
+
+@dataclasses.dataclass
+class JobStatus:
+    state: str # pending, running, done, cancelled or failed
+    count: int
+    elapsed: float
+    rate: float # Candidates per second
+    stages: dict # {stage: (percent, text)} as last reported
+    sample: list
+    error: BaseException = None
+
+
+class GenerationJob:
+    """Writes the words of ``produce()`` to ``path`` on a background thread.
+
+    ``produce`` is called on the worker thread, so slow setup (stems,
+    estimates) does not block the caller either. Pass ``report`` as the
+    engine's progress callback to surface per-stage progress.
+    """
+
+    def __init__(self, path, sample_size=20, batch_size=JOB_BATCH, compression=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.compression = compression
+        self.state = "pending"
+        self.count = 0
+        self.error = None
+        self._started = self._finished = None
+        self._stages = {}
+        self._sample = collections.deque(maxlen=sample_size)
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def report(self, stage, percent, text):
+        """Progress callback: ``WordlistEngine(..., progress=job.report)``."""
+        with self._lock: self._stages[stage] = (percent, text)
+
+    def start(self, produce):
+        self._thread = threading.Thread(target=self._run, args=(produce,), name="wordlist-job", daemon=True)
+        self.state = "running"
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self, produce):
+        words, state = None, "failed" # Kept if a BaseException (e.g. SystemExit) escapes
+        try:
+            words = iter(produce())
+            with FileSink(self.path, self.compression) as sink:
+                while not self._cancel.is_set():
+                    batch = list(islice(words, self.batch_size))
+                    if not batch: break
+                    sink.write_batch(batch)
+                    step = max(1, len(batch) // 4)
+                    with self._lock:
+                        self.count += len(batch)
+                        self._sample.extend(batch[::step])
+            state = "cancelled" if self._cancel.is_set() else "done"
+        except Exception as e:
+            self.error, state = e, "failed"
+        finally:
+            try:
+                if hasattr(words, 'close'): words.close() # Stops worker pools of a half-consumed stream
+            finally:
+                self._finished = time.perf_counter()
+                self.state = state
+
+    @property
+    def running(self):
+        return self.state in ("pending", "running")
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        if self._thread: self._thread.join(timeout)
+
+    def discard(self):
+        """Cancels the job, waits for it and deletes its output file."""
+        self.cancel()
+        self.join()
+        if os.path.exists(self.path): os.remove(self.path)
+
+    def status(self):
+        with self._lock:
+            count, stages, sample = self.count, dict(self._stages), list(self._sample)
+        if self._started is None: elapsed = 0.0
+        else: elapsed = (self._finished or time.perf_counter()) - self._started
+        return JobStatus(self.state, count, elapsed, count / elapsed if elapsed else 0.0, stages, sample, self.error)
@@ -0,0 +1,131 @@
+"""Precompiled leetspeak expansion.
+
+A word's leet variants are built once per distinct string, layered by how
+many characters were replaced, and memoised in an LRU cache. A suffixed
+word ``stem + suffix`` is then expanded by pairing the cached layers of the
+stem with those of the suffix, so a stem is expanded once no matter how many
+suffixes it is combined with.
+
+The cache is bounded by the number of variants it holds, not by entries: a
+long stem can have thousands of variants, and ``iter_leet`` needs each stem
+only while it runs through that stem's suffixes. The small suffix
+expansions stay cached; the last expansion is always kept, even when it is
+larger than the whole cache.
+"""
+from collections import OrderedDict
+
+DEFAULT_LEET_MAP = {'a': ['4', '@'], 'e': ['3'], 'i': ['1', '!', '|'], 'o': ['0'], 's': ['5', '$'], 't': ['7', '+'], 'l': ['1'], 'z': ['2']}
+DEFAULT_MAX_LEET_REPLACEMENTS = 4 # Limit complexity for web app responsiveness
+DEFAULT_CACHE_VARIANTS = 65536 # Cached variants (strings in layers and cumulative sets)
+
+
+def compile_leet_map(leet_map):
+    """Normalises a user map to ``{lowercase_char: (substitution, ...)}``.
+
+    A value may be a single substitution string or a list of them.
+    """
+    table = {}
+    for char, subs in leet_map.items():
+        if isinstance(subs, str): subs = [subs]
+        subs = tuple(dict.fromkeys(sub for sub in subs if sub))
+        if char and subs: table[char.lower()] = subs
+    return table
+
+
+class LeetEngine:
+    """Expands words into leetspeak variants with at most ``max_replacements`` substitutions.
+
+    ``cache_size`` bounds the number of cached variants (see the module docstring).
+    """
+
+    def __init__(self, leet_map=None, max_replacements=DEFAULT_MAX_LEET_REPLACEMENTS, cache_size=DEFAULT_CACHE_VARIANTS):
+        self.table = compile_leet_map(DEFAULT_LEET_MAP if leet_map is None else leet_map)
+        self.max_replacements = max_replacements
+        self.cache_size = cache_size
+        self._cache = OrderedDict() # text -> (layers, cumulative, cost), least recently used first
+        self._cached = 0
+        self._current = (None, None) # Last expansion, kept even when too large to cache
+
+    def _expansion(self, text):
+        if text == self._current[0]: return self._current[1]
+        entry = self._cache.get(text)
+        if entry is not None:
+            self._cache.move_to_end(text)
+        else:
+            layers = self._compute_layers(text)
+            cumulative = self._compute_cumulative(layers)
+            entry = (layers, cumulative, sum(map(len, layers)) + sum(map(len, cumulative)))
+            if entry[2] <= self.cache_size: # Larger ones live only in the current slot
+                self._cache[text] = entry
+                self._cached += entry[2]
+                while self._cached > self.cache_size: self._cached -= self._cache.popitem(last=False)[1][2]
+        self._current = (text, entry)
+        return entry
+
+    def _layers(self, text):
+        return self._expansion(text)[0]
+
+    def _cumulative(self, text):
+        return self._expansion(text)[1]
+
+    def _compute_layers(self, text):
+        """``layers[j]`` holds the variants of ``text`` with exactly ``j`` replacements."""
+        table, limit = self.table, self.max_replacements
+        layers = [[""]]
+        for char in text:
+            subs = table.get(char.lower())
+            grown = [[prefix + char for prefix in layer] for layer in layers]
+            if subs:
+                if len(layers) <= limit: grown.append([])
+                for j, layer in enumerate(layers[:limit]):
+                    grown[j + 1].extend(prefix + sub for prefix in layer for sub in subs)
+            layers = grown
+        return tuple(frozenset(layer) for layer in layers)
+
+    def _compute_cumulative(self, layers):
+        """``cumulative[j]`` holds the variants with at most ``j`` replacements."""
+        cumulative, seen = [], set()
+        for layer in layers:
+            seen = seen | layer
+            cumulative.append(frozenset(seen))
+        return tuple(cumulative)
+
+    def layers(self, text):
+        """Cached ``layers[j]``: variants of ``text`` with exactly ``j`` substitutions."""
+        return self._layers(text)
+
+    def variants(self, word):
+        """All variants of ``word``, including ``word`` itself."""
+        return set(self._cumulative(word)[-1])
+
+    def suffixed_variants(self, stem, suffix=""):
+        """Variants of ``stem + suffix`` excluding the unmodified word.
+
+        Equivalent to ``variants(stem + suffix)`` but built from the cached
+        expansions of ``stem`` and ``suffix``.
+        """
+        stem_cumulative = self._cumulative(stem)
+        if not suffix:
+            result = set(stem_cumulative[-1])
+        else:
+            result = set()
+            top = len(stem_cumulative) - 1
+            for j, suffix_layer in enumerate(self._layers(suffix)):
+                budget = self.max_replacements - j
+                if budget < 0: break
+                stem_variants = stem_cumulative[min(budget, top)]
+                for tail in suffix_layer:
+                    result.update(head + tail for head in stem_variants)
+        result.discard(stem + suffix)
+        return result
+
+    def exact_variants(self, stem, suffix, count):
+        """Variants of ``stem + suffix`` with exactly ``count`` substitutions."""
+        stem_layers, suffix_layers = self.layers(stem), self.layers(suffix)
+        result = set()
+        for i, heads in enumerate(stem_layers):
+            j = count - i
+            if 0 <= j < len(suffix_layers):
+                for tail in suffix_layers[j]:
+                    result.update(head + tail for head in heads)
+        return result
@@ -0,0 +1,280 @@
+"""Per-stage instrumentation of production runs.
+
+``InstrumentedEngine`` is a drop-in ``WordlistEngine`` that records, for
+base words, dates, years, every ``combine_elements`` call, the suffix and
+leetspeak stages, templates and the final dedup filter: input and output
+size, duplicate ratio, wall and CPU time, and peak memory. Metrics
+accumulate per stage name in an ``Instrumentation``; hooks are called with
+the updated ``StageMetrics`` each time a stage finishes, and the whole run
+can be written as a JSON report or in the Prometheus text format.
+
+Duplicate counts are exact for the in-memory stages (output another
+in-memory stage produced first, or repeated within the call) and for the
+final filter (candidates it dropped). Streamed stages are never held in
+memory, so their within-stage repeats are estimated with a HyperLogLog
+sketch (about 1% error).
+
+Streamed stages are timed only while producing words, not while the
+consumer (deduper, disk) works. ``trace_memory`` switches peak memory from
+the process's peak RSS to the tracemalloc peak within each stage and
+records the top allocation sites; ``profile_cpu`` runs the whole job under
+cProfile. Both slow generation down noticeably.
+"""
+import cProfile
+import dataclasses
+import functools
+import io
+import json
+import math
+import pstats
+import time
+import tracemalloc
+from itertools import islice
+
+from .bench import peak_rss_kb
+from .engine import WordlistEngine
+
+TIMED_BATCH = 1024 # Words pulled per timing sample in streamed stages
+
+
+@dataclasses.dataclass
+class StageMetrics:
+    stage: str
+    calls: int = 0
+    input_size: int = 0
+    output_size: int = 0
+    duplicates: int = 0
+    estimated: bool = False # duplicates come from a HyperLogLog estimate
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_kb: int = 0
+    traced_peak_kb: int = None # With trace_memory: tracemalloc peak inside the stage
+
+    @property
+    def duplicate_ratio(self):
+        return self.duplicates / self.output_size if self.output_size else 0.0
+
+    def as_dict(self):
+        data = dataclasses.asdict(self)
+        data.update(duplicate_ratio=round(self.duplicate_ratio, 4), wall_s=round(self.wall_s, 6), cpu_s=round(self.cpu_s, 6))
+        return data
+
+
+class DistinctCounter:
+    """HyperLogLog distinct-count estimate in 16 KiB."""
+
+    BITS = 14
+
+    def __init__(self):
+        self.registers = bytearray(1 << self.BITS)
+
+    def update(self, words):
+        registers, bits = self.registers, self.BITS
+        mask = (1 << bits) - 1
+        for word in words:
+            h = hash(word) & 0xFFFFFFFFFFFFFFFF
+            rank = 65 - bits - (h >> bits).bit_length()
+            if rank > registers[h & mask]: registers[h & mask] = rank
+
+    def estimate(self):
+        m = len(self.registers)
+        raw = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros: return m * math.log(m / zeros) # Small-range correction
+        return raw
+
+
+class Instrumentation:
+    """Collects ``StageMetrics`` per stage name and calls ``hooks`` as stages finish."""
+
+    def __init__(self, hooks=(), trace_memory=False, profile_cpu=False):
+        self.stages = {}
+        self.hooks = list(hooks)
+        self.trace_memory = trace_memory
+        self.profile_cpu = profile_cpu
+        self.cprofile_stats = None
+        self.top_allocations = None
+        self._origin = {} # Word -> in-memory stage that first produced it
+        self._profiler = None
+
+    def add_hook(self, hook):
+        """``hook(metrics)`` is called with the stage's ``StageMetrics`` after each call."""
+        self.hooks.append(hook)
+
+    # --- Opt-in profilers ---
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing(): tracemalloc.start()
+        if self.profile_cpu:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self, top=25):
+        if self._profiler:
+            self._profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(top)
+            self.cprofile_stats, self._profiler = out.getvalue(), None
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            self.top_allocations = [str(stat) for stat in snapshot.statistics('lineno')[:top]]
+            tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- Recording ---
+
+    def _record(self, stage, input_size, output_size, duplicates, wall, cpu, traced_peak=None, estimated=False):
+        m = self.stages.setdefault(stage, StageMetrics(stage))
+        m.calls += 1
+        m.input_size += input_size
+        m.output_size += output_size
+        m.duplicates += duplicates
+        m.estimated = m.estimated or estimated
+        m.wall_s += wall
+        m.cpu_s += cpu
+        m.peak_rss_kb = peak_rss_kb()
+        if traced_peak is not None: m.traced_peak_kb = max(m.traced_peak_kb or 0, traced_peak // 1024)
+        for hook in self.hooks: hook(m)
+
+    def _traced_peak(self):
+        return tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+
+    def measure(self, stage, func, input_size):
+        """Runs an in-memory stage; ``func()`` returns a collection of strings."""
+        if tracemalloc.is_tracing(): tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        output = func()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        traced_peak = self._traced_peak()
+        items = set(output)
+        for word in items: self._origin.setdefault(word, stage)
+        duplicates = len(output) - sum(1 for word in items if self._origin[word] == stage)
+        self._record(stage, input_size, len(output), duplicates, wall, cpu, traced_peak)
+        return output
+
+    def _timed(self, words, totals):
+        """Re-yields ``words``, adding the count and the time spent producing them to ``totals``."""
+        words = iter(words)
+        try:
+            while True:
+                if tracemalloc.is_tracing(): tracemalloc.reset_peak()
+                wall, cpu = time.perf_counter(), time.process_time()
+                batch = list(islice(words, TIMED_BATCH))
+                totals['wall'] += time.perf_counter() - wall
+                totals['cpu'] += time.process_time() - cpu
+                traced_peak = self._traced_peak()
+                if traced_peak is not None: totals['traced_peak'] = max(totals['traced_peak'] or 0, traced_peak)
+                if not batch: return
+                totals['count'] += len(batch)
+                yield batch
+        finally:
+            if hasattr(words, 'close'): words.close()
+
+    def wrap(self, stage, words, input_size):
+        """Streams a lazy stage, estimating its repeats with a ``DistinctCounter``."""
+        totals = {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'traced_peak': None}
+        distinct = DistinctCounter()
+        try:
+            for batch in self._timed(words, totals):
+                distinct.update(batch)
+                yield from batch
+        finally:
+            duplicates = max(0, totals['count'] - round(distinct.estimate())) if totals['count'] else 0
+            self._record(stage, input_size, totals['count'], duplicates, totals['wall'], totals['cpu'],
+                         totals['traced_peak'], estimated=True)
+
+    def filter(self, stage, deduper, words):
+        """Streams ``deduper.filter(words)``, timing the filter apart from ``words``."""
+        upstream = {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'traced_peak': None}
+        totals = dict(upstream)
+        def source():
+            for batch in self._timed(words, upstream): yield from batch
+        try:
+            for batch in self._timed(deduper.filter(source()), totals): yield from batch
+        finally:
+            self._record(stage, upstream['count'], totals['count'], upstream['count'] - totals['count'],
+                         max(0.0, totals['wall'] - upstream['wall']), max(0.0, totals['cpu'] - upstream['cpu']),
+                         totals['traced_peak'])
+
+    # --- Reports ---
+
+    def report(self):
+        return {
+            "stages": [m.as_dict() for m in self.stages.values()],
+            "cprofile": self.cprofile_stats,
+            "top_allocations": self.top_allocations,
+        }
+
+    def prometheus(self):
+        """The stage metrics in the Prometheus text exposition format."""
+        series = [
+            ("input_items", "counter", "Items fed into the stage.", lambda m: m.input_size),
+            ("output_items", "counter", "Items the stage produced.", lambda m: m.output_size),
+            ("duplicate_ratio", "gauge", "Share of the stage output that repeats earlier output.", lambda m: round(m.duplicate_ratio, 6)),
+            ("wall_seconds", "counter", "Wall time spent in the stage.", lambda m: round(m.wall_s, 6)),
+            ("cpu_seconds", "counter", "CPU time spent in the stage.", lambda m: round(m.cpu_s, 6)),
+            ("peak_memory_bytes", "gauge", "Peak memory when the stage finished (tracemalloc peak when tracing, else process RSS).",
+             lambda m: (m.traced_peak_kb if m.traced_peak_kb is not None else m.peak_rss_kb) * 1024),
+        ]
+        lines = []
+        for name, kind, help_text, value in series:
+            metric = f"wordlistgen_stage_{name}"
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            for m in self.stages.values():
+                stage = m.stage.replace('\\', '\\\\').replace('"', '\\"')
+                lines.append(f'{metric}{{stage="{stage}"}} {value(m)}')
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        """Writes the Prometheus text for ``.prom`` files, else the JSON report."""
+        with open(path, 'w', encoding='utf-8') as f:
+            if path.endswith('.prom'): f.write(self.prometheus())
+            else: json.dump(self.report(), f, indent=2)
+
+
+class InstrumentedEngine(WordlistEngine):
+    """``WordlistEngine`` recording every stage into ``metrics`` (an ``Instrumentation``).
+
+    The suffix and leetspeak stages are measured in stage order; ranked
+    output expands them inline, so only their inputs and the final filter
+    are measured there.
+    """
+
+    def __init__(self, info, settings=None, progress=None, shared=None, metrics=None):
+        super().__init__(info, settings, progress, shared)
+        self.metrics = metrics or Instrumentation()
+
+    def base_words(self):
+        fields = sum(1 for collection in self.string_collections() for item in collection or [] if item)
+        return self.metrics.measure("base_words", super().base_words, fields)
+
+    def date_variations(self, all_dates):
+        return self.metrics.measure("dates", functools.partial(super().date_variations, all_dates), len(all_dates))
+
+    def year_nums(self, all_dates):
+        input_size = len(all_dates) + len(self.info.get('important_years', []))
+        return self.metrics.measure("years", functools.partial(super().year_nums, all_dates), input_size)
+
+    def combine(self, label, list1, list2, separators=None):
+        func = functools.partial(super().combine, label, list1, list2, separators)
+        return self.metrics.measure(f"combine:{label}", func, len(list1) + len(list2))
+
+    def expand_stage(self, stage, stems, suffixes):
+        return self.metrics.wrap(stage, super().expand_stage(stage, stems, suffixes), len(stems))
+
+    def iter_templates(self, values=None, old_values=None):
+        return self.metrics.wrap("templates", super().iter_templates(values, old_values), len(self.templates))
+
+    def template_leet(self, words):
+        return self.metrics.wrap("template_leet", super().template_leet(words), 0)
+
+    def stream(self):
+        words = self.metrics.filter("final_filter", self.deduper(), self.candidates())
+        if self.settings.max_candidates: words = islice(words, self.settings.max_candidates)
+        return words
@@ -0,0 +1,171 @@
+"""Process-pool execution of the suffix and leetspeak stages.
+
+Each stem expands independently, so the stem list is sharded into chunks,
+expanded in worker processes and streamed back chunk by chunk. Only a
+bounded number of chunks is in flight at once, so a slow consumer (disk,
+dedup) applies back-pressure instead of letting results pile up in memory.
+
+``sharded_expand`` sends every word back to the parent, whose deduper and
+writer are single-threaded: unpickling, deduplicating and writing cost more
+than expanding, so it tops out around 1.4x. ``partitioned_expand`` keeps
+words out of the parent: workers route each word by hash to one of
+``PARTITIONS_PER_WORKER * workers`` spill files, each partition is then
+deduplicated (exactly) by one worker, and the parent only copies the
+partition files to the sink as raw buffers. A worker holds at most
+``settings.spill_run_size`` distinct words of a partition in memory; larger
+partitions are sorted on disk like ``ExternalSortDeduper`` does.
+"""
+import os
+import tempfile
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .dedup import ExternalSortDeduper
+
+PARTITIONS_PER_WORKER = 4 # More, smaller partitions bound the memory of each dedup task
+READ_BLOCK = 1 << 20
+PARTITIONED_DEDUP = ("exact", "window", "external") # Modes whose guarantees partitioned dedup meets
+
+_worker_engine = None
+_worker_suffixes = None
+
+
+def _init_worker(settings, suffixes):
+    global _worker_engine, _worker_suffixes
+    from .engine import WordlistEngine
+    _worker_engine = WordlistEngine({}, settings)
+    _worker_suffixes = suffixes
+
+
+def _expand_chunk(stage, stems):
+    engine = _worker_engine
+    if stage == "suffixes": words = engine.iter_suffixed(stems, _worker_suffixes)
+    else: words = engine.iter_leet(stems, _worker_suffixes)
+    min_len = engine.settings.min_len
+    return [w for w in dict.fromkeys(words) if len(w) >= min_len] # Dedup inside the chunk before pickling, keeping order
+
+
+def spill(words, run_dir, partitions, tag):
+    """Appends ``words`` to ``part<N>.<tag>`` files in ``run_dir`` by hash of their UTF-8 bytes."""
+    buckets = [[] for _ in range(partitions)]
+    for word in words:
+        key = word.encode('utf-8')
+        buckets[zlib.crc32(key) % partitions].append(key)
+    for partition, bucket in enumerate(buckets):
+        if not bucket: continue
+        with open(os.path.join(run_dir, f"part{partition:04d}.{tag}"), 'ab') as f:
+            f.write(b"\n".join(bucket) + b"\n")
+
+
+def _spill_chunk(stages, stems, run_dir, partitions):
+    engine = _worker_engine
+    min_len = engine.settings.min_len
+    for stage in stages:
+        if stage == "suffixes": words = engine.iter_suffixed(stems, _worker_suffixes)
+        else: words = (w for w in engine.iter_leet(stems, _worker_suffixes) if len(w) >= min_len)
+        spill(words, run_dir, partitions, os.getpid())
+    return len(stems)
+
+
+def _partition_lines(paths):
+    for path in paths:
+        with open(path, 'rb', buffering=READ_BLOCK) as f: yield from f
+
+
+def _dedup_partition(paths, out_path, run_size, tmp_dir):
+    """Writes the distinct lines of ``paths`` to ``out_path``; returns their count.
+
+    Up to ``run_size`` distinct lines are deduplicated in memory, in
+    first-seen order. A larger partition is re-read through an
+    ``ExternalSortDeduper`` with the same run size and comes out sorted.
+    """
+    lines = {}
+    for line in _partition_lines(paths):
+        lines[line] = None
+        if len(lines) > run_size: break
+    else:
+        with open(out_path, 'wb') as f: f.writelines(lines)
+        return len(lines)
+    lines = None
+    count = 0
+    words = (line[:-1].decode('utf-8') for line in _partition_lines(paths))
+    with open(out_path, 'w', encoding='utf-8', newline='\n', buffering=READ_BLOCK) as f:
+        for word in ExternalSortDeduper(run_size, tmp_dir).filter(words):
+            f.write(word + "\n")
+            count += 1
+    return count
+
+
+def resolve_workers(workers):
+    """``0`` or ``None`` means one worker per core."""
+    return workers or os.cpu_count() or 1
+
+
+def sharded_expand(stage, stems, suffixes, settings, workers=None, chunk_size=2000, progress=None):
+    """Yields the ``stage`` ("suffixes" or "leetspeak") expansion of ``stems``.
+
+    Chunks are yielded in stem order, whichever worker finishes first, so
+    the output (and a truncation of it) is the same every run.
+    ``progress`` is called as ``progress(done_stems, total_stems)`` after each
+    chunk comes back.
+    """
+    workers = resolve_workers(workers)
+    chunks = [stems[i:i + chunk_size] for i in range(0, len(stems), chunk_size)]
+    total, done = len(stems), 0
+    max_in_flight = workers * 2
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings, suffixes)) as pool:
+        pending = deque()
+        next_chunk = 0
+        while pending or next_chunk < len(chunks):
+            while next_chunk < len(chunks) and len(pending) < max_in_flight:
+                chunk = chunks[next_chunk]
+                pending.append((pool.submit(_expand_chunk, stage, chunk), len(chunk)))
+                next_chunk += 1
+            future, size = pending.popleft()
+            done += size
+            yield from future.result()
+            if progress: progress(done, total)
+
+
+def partitioned_expand(words, stages, stems, suffixes, settings, workers=None, chunk_size=2000, tmp_dir=None, progress=None):
+    """Yields ``(buffer, lines)`` blocks holding ``words`` plus the ``stages``
+    expansion of ``stems``, exactly deduplicated, partition by partition.
+
+    ``words`` (stems, template words) are spilled by the parent; the
+    expansion and the dedup run in ``workers`` processes. ``progress`` is
+    called as ``progress(done_stems, total_stems)``.
+    """
+    workers = resolve_workers(workers)
+    partitions = workers * PARTITIONS_PER_WORKER
+    chunks = [stems[i:i + chunk_size] for i in range(0, len(stems), chunk_size)]
+    total, done = len(stems), 0
+    with tempfile.TemporaryDirectory(prefix="wordlist-parts-", dir=tmp_dir) as run_dir:
+        spill(words, run_dir, partitions, "main")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings, suffixes)) as pool:
+            pending = set()
+            next_chunk = 0
+            while pending or next_chunk < len(chunks):
+                while next_chunk < len(chunks) and len(pending) < workers * 2:
+                    pending.add(pool.submit(_spill_chunk, stages, chunks[next_chunk], run_dir, partitions))
+                    next_chunk += 1
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += future.result()
+                    if progress: progress(done, total)
+
+            paths = defaultdict(list)
+            for name in sorted(os.listdir(run_dir), key=lambda name: (not name.endswith(".main"), name)): # Stems first
+                paths[int(name[4:8])].append(os.path.join(run_dir, name))
+            outputs = []
+            for partition in sorted(paths):
+                out_path = os.path.join(run_dir, f"out{partition:04d}")
+                outputs.append((out_path, pool.submit(_dedup_partition, paths[partition], out_path, settings.spill_run_size, run_dir)))
+            for out_path, future in outputs:
+                future.result()
+                with open(out_path, 'rb') as f:
+                    while True:
+                        data = f.read(READ_BLOCK)
+                        if not data: break
+                        yield data, data.count(b"\n") # Blocks may split a line; the counts still add up
+                os.remove(out_path)
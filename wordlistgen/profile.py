@@ -0,0 +1,87 @@
+"""Loading target profiles (the ``info`` dict) from JSON or TOML files."""
+import dataclasses
+import datetime
+import json
+import os
+
+from .engine import DATE_FIELDS, LIST_FIELDS, STRING_FIELDS, GenerationSettings
+from .helpers import parse_list_input, validate_date_str, validate_year_str
+
+
+def empty_info():
+    """An ``info`` dict with every field present and blank."""
+    info = {name: '' for name in STRING_FIELDS}
+    info.update({name: [] for name in LIST_FIELDS})
+    info.update({name: None for name in DATE_FIELDS})
+    return info
+
+
+def _parse_date(value):
+    if not value: return None
+    if isinstance(value, datetime.date): return value
+    value = str(value).strip()
+    if not validate_date_str(value):
+        raise ValueError(f"Invalid date {value!r}; expected YYYY-MM-DD")
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _parse_list(value):
+    if not value: return []
+    if isinstance(value, str): return parse_list_input(value)
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def info_from_dict(data):
+    """Builds an ``info`` dict from loosely typed profile data.
+
+    List fields accept a list or a comma/newline separated string and dates
+    accept ``YYYY-MM-DD`` strings, matching what the Streamlit form produces.
+    Unknown keys are ignored.
+    """
+    info = empty_info()
+    for name in STRING_FIELDS:
+        if data.get(name): info[name] = str(data[name]).strip()
+    for name in LIST_FIELDS:
+        info[name] = _parse_list(data.get(name))
+    for name in DATE_FIELDS:
+        info[name] = _parse_date(data.get(name))
+    info['important_years'] = [y for y in info['important_years'] if validate_year_str(y)]
+    return info
+
+
+def settings_from_dict(data, base=None):
+    """Applies the known ``GenerationSettings`` fields in ``data`` on top of ``base``."""
+    known = {f.name for f in dataclasses.fields(GenerationSettings)}
+    unknown = set(data) - known
+    if unknown:
+        raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+    return dataclasses.replace(base or GenerationSettings(), **data)
+
+
+def _load_toml(path):
+    try:
+        import tomllib
+    except ImportError: # Python < 3.11
+        import toml
+        return toml.load(path)
+    with open(path, 'rb') as f:
+        return tomllib.load(f)
+
+
+def load_profile_data(path):
+    """Reads a profile file as a plain dict (``.toml`` or JSON)."""
+    if os.path.splitext(path)[1].lower() == '.toml':
+        return _load_toml(path)
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_profile(path, base_settings=None):
+    """Loads ``(info, settings)`` from a profile file.
+
+    Target fields live at the top level; an optional ``settings`` table
+    overrides ``GenerationSettings`` fields.
+    """
+    data = load_profile_data(path)
+    settings = settings_from_dict(data.get('settings', {}), base_settings)
+    return info_from_dict(data), settings
@@ -0,0 +1,103 @@
+"""Likelihood-ranked candidate ordering.
+
+Every candidate gets a cost from the transformations that produced it: the
+kind of stem (a name as typed, a case/reversed variant, a number, a
+combination), the kind of suffix and the number of leet substitutions.
+Candidates are emitted tier by tier in increasing cost, each tier enumerated
+lazily, so guessing tools try the likeliest words first and the output can
+be truncated to the top K without building the rest.
+
+With an exact deduper each word is emitted once, at its lowest cost.
+"""
+from collections import defaultdict
+
+from .config import COMMON_NUMBER_SEQUENCES
+from .suffixes import SuffixIndex
+
+COSTS = {
+    "base": 0, # A field as typed, lowercased or capitalised
+    "base_variant": 1, # UPPERCASE or reversed
+    "combination": 2, # word + number, name + keyword, first + last
+    "numeric": 2, # A date, year or lucky number on its own
+    "numeric_first": 3, # number + word
+    "template": 2, # A word from a combination template
+    "common_suffix": 1, # 0-9 and COMMON_NUMBER_SEQUENCES
+    "numeric_suffix": 2, # Other numbers, years, dates
+    "special_suffix": 2, # One special char
+    "special_combo_suffix": 3, # Several special chars
+    "word_suffix": 3, # Suffixes with letters (month names)
+    "leet_replacement": 2, # Per substituted character
+}
+COMMON_SUFFIXES = frozenset([str(i) for i in range(10)] + COMMON_NUMBER_SEQUENCES)
+
+
+def stem_costs(engine, stems, base_words, numeric_affixes):
+    """Cost of every stem, from where it came from."""
+    primary = set()
+    for collection in engine.string_collections():
+        for item in collection or []:
+            if item: primary.update((str(item).lower(), str(item).capitalize()))
+    numeric = set(numeric_affixes)
+    costs = {}
+    for word in stems:
+        if word in primary: costs[word] = COSTS["base"]
+        elif word in base_words: costs[word] = COSTS["base_variant"]
+        elif word in numeric: costs[word] = COSTS["numeric"]
+        elif word[:1].isdigit(): costs[word] = COSTS["numeric_first"]
+        else: costs[word] = COSTS["combination"]
+    return costs
+
+
+def suffix_cost(suffix):
+    if suffix in COMMON_SUFFIXES: return COSTS["common_suffix"]
+    if suffix.isdigit(): return COSTS["numeric_suffix"]
+    if any(c.isalpha() for c in suffix): return COSTS["word_suffix"]
+    if len(suffix) == 1: return COSTS["special_suffix"]
+    if not any(c.isalnum() for c in suffix): return COSTS["special_combo_suffix"]
+    return COSTS["numeric_suffix"]
+
+
+def ranked_candidates(engine):
+    """Yields candidates in non-decreasing cost; the same word may repeat."""
+    s = engine.settings
+    engine._report("status", None, "Processing base words and dates...")
+    base_words = engine.base_words()
+    numeric_affixes = engine.numeric_affixes()
+    stems = sorted(w for w in engine.combinations(base_words, numeric_affixes) if len(w) <= s.max_len)
+
+    # Everything below iterates in sorted order, so a top-K cut is the same every run.
+    stem_groups = defaultdict(list)
+    for word, cost in stem_costs(engine, stems, base_words, numeric_affixes).items():
+        stem_groups[cost].append(word)
+    suffix_groups = defaultdict(list)
+    for suffix in engine.suffixes(numeric_affixes):
+        suffix_groups[suffix_cost(suffix)].append(suffix)
+    # The empty suffix (bare stem) costs nothing.
+    tails = [(0, None)] + [(cost, SuffixIndex(group, s.max_len)) for cost, group in sorted(suffix_groups.items())]
+    leet_counts = range(s.max_leet_replacements + 1) if s.enable_leet else [0]
+    leet_step = COSTS["leet_replacement"]
+
+    template_values = engine.template_values() if engine.templates else None
+
+    max_tier = max(max(stem_groups, default=0) + max(cost for cost, _ in tails), COSTS["template"]) + leet_step * leet_counts[-1]
+    for tier in range(max_tier + 1):
+        engine._report("status", None, f"Ranking: tier {tier + 1}/{max_tier + 1}...")
+        j, rest = divmod(tier - COSTS["template"], leet_step)
+        if template_values and not rest and j in leet_counts:
+            for word in engine.iter_templates(template_values):
+                if j == 0: yield word
+                else: yield from (w for w in sorted(engine.leet.exact_variants(word, "", j)) if s.min_len <= len(w) <= s.max_len)
+        for stem_cost, group in sorted(stem_groups.items()):
+            for tail_cost, index in tails:
+                j, rest = divmod(tier - stem_cost - tail_cost, leet_step)
+                if rest or j not in leet_counts: continue
+                for stem in group:
+                    suffixes = [""] if index is None else index.fitting(len(stem), s.min_len if j == 0 else 0)
+                    for suffix in suffixes:
+                        if j == 0:
+                            if len(stem) + len(suffix) >= s.min_len: yield stem + suffix
+                            continue
+                        for word in sorted(engine.leet.exact_variants(stem, suffix, j)):
+                            if s.min_len <= len(word) <= s.max_len: yield word
+    engine._report("suffixes", 100, "Suffixes: Complete!")
+    engine._report("leetspeak", 100, "Leetspeak: Complete!" if s.enable_leet else "Leetspeak: Skipped")
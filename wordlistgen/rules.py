@@ -0,0 +1,130 @@
+"""Export a compact dictionary plus hashcat rules instead of every candidate.
+
+The stems (base words with their case variants, combinations, dates),
+template words and their leet variants go into dictionary files; suffixes, and the leet
+variants of suffixes, become ``$X`` append rules that the cracking tool
+applies itself. Stems are grouped by length and by how many leet
+substitutions they carry, and each group gets exactly the rules that keep
+it within ``min_len``..``max_len`` and the leet budget. No rejection rules
+are needed, so the rules also run on GPU rule engines.
+
+Running every ``(dictionary, rules)`` pair produces exactly the set
+``WordlistEngine.generate()`` returns; ``verify()`` checks this by expanding
+the rules in Python.
+"""
+import json
+import os
+from collections import defaultdict
+
+MANIFEST = "manifest.json"
+
+
+def append_rule(suffix):
+    """Hashcat rule appending ``suffix`` (``:`` for none); non-ASCII and ``\\`` as ``\\xHH`` bytes."""
+    if not suffix: return ":"
+    parts = []
+    for char in suffix:
+        if char.isascii() and char.isprintable() and char != '\\': parts.append("$" + char)
+        else: parts.extend(f"$\\x{b:02x}" for b in char.encode('utf-8'))
+    return "".join(parts)
+
+
+def parse_rule(rule):
+    """Inverse of ``append_rule``: the suffix a ``:`` / ``$X`` rule appends."""
+    out = bytearray()
+    i = 0
+    while i < len(rule):
+        op = rule[i]
+        if op == ':':
+            i += 1
+        elif op == '$' and rule[i + 1:i + 3] == '\\x':
+            out.append(int(rule[i + 3:i + 5], 16))
+            i += 5
+        elif op == '$':
+            out.extend(rule[i + 1].encode('utf-8'))
+            i += 2
+        else:
+            raise ValueError(f"Unsupported rule function {op!r} in {rule!r}")
+    return out.decode('utf-8')
+
+
+def build_groups(engine):
+    """Maps each distinct rule set to the dictionary words that take it.
+
+    With ``max_candidates`` the budget's pruned settings are used; truncation
+    past them cannot be expressed as rules, so ``engine.generate()`` may hold
+    fewer candidates.
+    """
+    if engine.settings.max_candidates and engine.estimate is None: engine.apply_budget()
+    s = engine.settings
+    leet = engine.leet
+    if s.enable_leet and any(len(sub) != 1 for subs in leet.table.values() for sub in subs):
+        raise ValueError("Rule export needs single-character leet substitutions")
+    max_leet = s.max_leet_replacements if s.enable_leet else 0
+
+    numeric_affixes = engine.numeric_affixes()
+    stems = [w for w in engine.combinations(engine.base_words(), numeric_affixes) if len(w) <= s.max_len]
+    suffixes = engine.suffixes(numeric_affixes)
+
+    # Rules for a stem of length L carrying i substitutions: every suffix
+    # variant with at most max_leet - i substitutions that lands in range.
+    rule_sets = {}
+    def rules_for(length, used):
+        key = (length, used)
+        if key not in rule_sets:
+            rules = set()
+            tails = ([""] if length >= s.min_len else []) + list(suffixes.fitting(length, s.min_len))
+            for tail in tails:
+                for layer in leet.layers(tail)[:max_leet - used + 1]:
+                    rules.update(append_rule(t) for t in layer)
+            rule_sets[key] = tuple(sorted(rules))
+        return rule_sets[key]
+
+    groups = defaultdict(set)
+    for stem in stems:
+        for used, layer in enumerate(leet.layers(stem)[:max_leet + 1]):
+            rules = rules_for(len(stem), used)
+            if rules: groups[rules].update(layer)
+    # Template words are complete candidates: no suffixes, only their leet variants.
+    for word in engine.iter_templates():
+        for layer in leet.layers(word)[:max_leet + 1]:
+            groups[(append_rule(""),)].update(layer)
+    return groups
+
+
+def export_rules(engine, out_dir):
+    """Writes ``group-NNN.dict`` / ``group-NNN.rule`` pairs and a manifest; returns the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    groups = build_groups(engine)
+    manifest = {"groups": []}
+    for n, (rules, words) in enumerate(sorted(groups.items(), key=lambda item: -len(item[1]))):
+        dict_name, rule_name = f"group-{n:03d}.dict", f"group-{n:03d}.rule"
+        with open(os.path.join(out_dir, dict_name), 'w', encoding='utf-8', newline='\n') as f:
+            f.writelines(word + "\n" for word in sorted(words))
+        with open(os.path.join(out_dir, rule_name), 'w', encoding='utf-8', newline='\n') as f:
+            f.writelines(rule + "\n" for rule in rules)
+        manifest["groups"].append({"dictionary": dict_name, "rules": rule_name, "words": len(words), "rule_count": len(rules)})
+    manifest["dictionary_words"] = sum(g["words"] for g in manifest["groups"])
+    manifest["expanded_candidates"] = sum(g["words"] * g["rule_count"] for g in manifest["groups"])
+    manifest["usage"] = "hashcat -a 0 HASHES <dictionary> -r <rules>, once per group"
+    with open(os.path.join(out_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def expand(out_dir):
+    """Yields every candidate the exported groups produce (repeats possible)."""
+    with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    for group in manifest["groups"]:
+        with open(os.path.join(out_dir, group["rules"]), encoding='utf-8') as f:
+            tails = [parse_rule(line.rstrip("\n")) for line in f]
+        with open(os.path.join(out_dir, group["dictionary"]), encoding='utf-8') as f:
+            for line in f:
+                word = line.rstrip("\n")
+                for tail in tails: yield word + tail
+
+
+def verify(engine, out_dir):
+    """True if expanding the export gives exactly ``engine.generate()``."""
+    return set(expand(out_dir)) == engine.generate()
@@ -0,0 +1,293 @@
+"""Output sinks: buffered, compressed, split and background-threaded writers.
+
+A sink takes batches of words (``write_batch(list)``) or pre-encoded
+newline-terminated buffers (``write_buffer(data, lines)``, see bulk.py) and
+is closed when the run ends; ``write_words`` feeds a word stream into any
+sink in large blocks.
+Sinks compose: ``ThreadedSink(SplitSink(...))`` writes split, compressed
+files from a background thread.
+"""
+import bz2
+import gzip
+import lzma
+import os
+import queue
+import sys
+import threading
+from itertools import islice
+
+from .wordindex import INDEX_EXTENSION, IndexSink
+
+WRITE_BATCH = 65536 # Words per write_batch() call
+BUFFER_SIZE = 1 << 20
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".xz": "xz", ".bz2": "bz2", ".zst": "zstd"}
+ARROW_EXTENSION = ".arrow"
+EXTENSIONS = {kind: ext for ext, kind in COMPRESSION_EXTENSIONS.items()}
+
+
+def _encode(words):
+    return ("\n".join(words) + "\n").encode('utf-8') if words else b""
+
+
+def compression_for(path):
+    """Compression implied by the file extension, or None."""
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def open_binary(path, compression=None, level=None):
+    """Opens ``path`` for binary writing through the given compressor."""
+    if compression is None:
+        return open(path, 'wb', buffering=BUFFER_SIZE)
+    return compressor(path, compression, level)
+
+
+def compressor(target, compression, level=None):
+    """Compressing writer over ``target``: a path, or a binary file object left open on close."""
+    if compression == "gzip":
+        return gzip.open(target, 'wb', compresslevel=6 if level is None else level)
+    if compression == "xz":
+        return lzma.open(target, 'wb', preset=level)
+    if compression == "bz2":
+        return bz2.open(target, 'wb', compresslevel=9 if level is None else level)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd output needs the 'zstandard' package (pip install zstandard)") from None
+        owned = isinstance(target, (str, bytes, os.PathLike))
+        raw = open(target, 'wb', buffering=BUFFER_SIZE) if owned else target
+        return zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(raw, closefd=owned)
+    raise ValueError(f"Unknown compression {compression!r}; expected gzip, xz, bz2 or zstd")
+
+
+class FileSink:
+    """Writes to one file (``"-"`` for stdout), optionally compressed."""
+
+    def __init__(self, path, compression=None, level=None):
+        self.path = path
+        self.lines = self.bytes = 0
+        if path == "-":
+            self._stdout = sys.stdout.buffer
+            self._file = compressor(self._stdout, compression, level) if compression else self._stdout
+        else:
+            self._stdout = None
+            self._file = open_binary(path, compression, level)
+
+    def write_batch(self, words):
+        data = _encode(words)
+        self._file.write(data)
+        self.lines += len(words)
+        self.bytes += len(data)
+
+    def write_buffer(self, data, lines):
+        self._file.write(data)
+        self.lines += lines
+        self.bytes += len(data)
+
+    def close(self):
+        if self._file is not self._stdout: self._file.close() # Compressors over stdout leave it open
+        if self._stdout: self._stdout.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SplitSink:
+    """Rolls over to ``<base>.0001<ext>``, ``<base>.0002<ext>``... every
+    ``max_lines`` lines and/or ``max_bytes`` uncompressed bytes.
+
+    Files only split on line boundaries; a single line longer than
+    ``max_bytes`` gets a file of its own.
+    """
+
+    def __init__(self, path, max_lines=None, max_bytes=None, compression=None, level=None):
+        if not max_lines and not max_bytes:
+            raise ValueError("SplitSink needs max_lines or max_bytes")
+        base, ext = os.path.splitext(path)
+        if ext.lower() in COMPRESSION_EXTENSIONS:
+            base, inner = os.path.splitext(base)
+            ext = inner + ext
+        self._base, self._ext = base, ext
+        self.max_lines, self.max_bytes = max_lines, max_bytes
+        self.compression, self.level = compression, level
+        self.paths = []
+        self._current = None
+        self.lines = self.bytes = 0
+
+    def _roll(self):
+        if self._current: self._current.close()
+        path = f"{self._base}.{len(self.paths) + 1:04d}{self._ext}"
+        self.paths.append(path)
+        self._current = FileSink(path, self.compression, self.level)
+
+    def _room(self, words):
+        """How many of ``words`` fit in the current file."""
+        current = self._current
+        take = len(words)
+        if self.max_lines: take = min(take, self.max_lines - current.lines)
+        if self.max_bytes:
+            room, fit = self.max_bytes - current.bytes, 0
+            for word in islice(words, take):
+                room -= len(word.encode('utf-8')) + 1
+                if room < 0: break
+                fit += 1
+            take = fit if fit or current.lines else 1
+        return take
+
+    def write_batch(self, words):
+        while words:
+            if self._current is None: self._roll()
+            take = self._room(words)
+            if take <= 0:
+                self._roll()
+                continue
+            before = self._current.bytes
+            self._current.write_batch(words[:take])
+            self.lines += take
+            self.bytes += self._current.bytes - before
+            words = words[take:]
+
+    def write_buffer(self, data, lines):
+        """Splits only on line boundaries, so the buffer is decoded back into words."""
+        self.write_batch(data.decode('utf-8').split("\n")[:-1])
+
+    def close(self):
+        if self._current: self._current.close()
+        self._current = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ThreadedSink:
+    """Runs another sink on a background thread behind a bounded queue.
+
+    Generation keeps going while the disk or compressor catches up; once
+    ``max_pending`` batches are queued the producer waits. Errors raised by
+    the writer thread are re-raised on the next write or on ``close()``.
+    """
+
+    _DONE = object()
+
+    def __init__(self, sink, max_pending=8):
+        self.sink = sink
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="wordlist-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._DONE: return
+            if self._error is None:
+                write, args = item
+                try: write(*args)
+                except BaseException as e: self._error = e
+
+    def _raise_error(self):
+        if self._error is not None: raise self._error
+
+    def write_batch(self, words):
+        self._raise_error()
+        self._queue.put((self.sink.write_batch, (list(words),)))
+
+    def write_buffer(self, data, lines):
+        self._raise_error()
+        self._queue.put((self.sink.write_buffer, (data, lines)))
+
+    def close(self):
+        self._queue.put(self._DONE)
+        self._thread.join()
+        self.sink.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ArrowSink:
+    """Writes an Arrow IPC file with one ``word`` string column (needs pyarrow)."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.ipc
+        except ImportError:
+            raise ImportError("Arrow output needs the 'pyarrow' package (pip install pyarrow)") from None
+        self._pa = pa
+        self.path = path
+        self.lines = self.bytes = 0
+        self.schema = pa.schema([("word", pa.string())])
+        self._file = pa.OSFile(path, 'wb')
+        self._writer = pa.ipc.new_file(self._file, self.schema)
+
+    def write_record_batch(self, batch):
+        self._writer.write_batch(batch)
+        self.lines += batch.num_rows
+        self.bytes += batch.nbytes
+
+    def write_batch(self, words):
+        if words: self.write_record_batch(self._pa.record_batch([self._pa.array(words, self._pa.string())], schema=self.schema))
+
+    def write_buffer(self, data, lines):
+        self.write_batch(data.decode('utf-8').split("\n")[:-1])
+
+    def close(self):
+        self._writer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_sink(path, compression=None, level=None, split_lines=None, split_bytes=None, threaded=False):
+    """Builds the sink for ``path``; compression defaults to the file extension.
+
+    ``.arrow`` paths get an ``ArrowSink`` and ``.wlx`` paths an ``IndexSink``
+    (see wordindex.py); neither compresses nor splits.
+    """
+    ext = os.path.splitext(path)[1].lower() if path != "-" else ""
+    structured = ext in (ARROW_EXTENSION, INDEX_EXTENSION)
+    if compression is None and path != "-" and not structured: compression = compression_for(path)
+    if structured:
+        if compression or split_lines or split_bytes: raise ValueError(f"{ext} output cannot be compressed or split")
+        sink = ArrowSink(path) if ext == ARROW_EXTENSION else IndexSink(path)
+    elif split_lines or split_bytes:
+        if path == "-": raise ValueError("Split output needs a file path, not stdout")
+        sink = SplitSink(path, split_lines, split_bytes, compression, level)
+    else:
+        sink = FileSink(path, compression, level)
+    return ThreadedSink(sink) if threaded else sink
+
+
+def write_words(words, sink, batch_size=WRITE_BATCH):
+    """Feeds ``words`` into ``sink`` in batches; returns the number written."""
+    count = 0
+    words = iter(words)
+    while True:
+        batch = list(islice(words, batch_size))
+        if not batch: return count
+        sink.write_batch(batch)
+        count += len(batch)
+
+
+def write_buffers(buffers, sink):
+    """Feeds ``(buffer, lines)`` blocks into ``sink``; returns the number of lines."""
+    count = 0
+    for data, lines in buffers:
+        sink.write_buffer(data, lines)
+        count += lines
+    return count
@@ -0,0 +1,52 @@
+"""Length-bucketed suffix index."""
+from itertools import islice
+
+
+class SuffixIndex:
+    """Suffixes sorted by length with prefix offsets per length.
+
+    ``offsets[n]`` is the number of suffixes no longer than ``n``, so the
+    suffixes that still fit after a word of a given length are a prefix of
+    ``suffixes`` found in O(1), without scanning the ones that cannot fit.
+    """
+
+    def __init__(self, suffixes, max_len):
+        self.suffixes = tuple(sorted({s for s in suffixes if s}, key=lambda s: (len(s), s)))
+        self.max_len = max_len
+        offsets = [0] * (max_len + 1)
+        for suffix in self.suffixes:
+            if len(suffix) <= max_len: offsets[len(suffix)] += 1
+        for n in range(1, max_len + 1):
+            offsets[n] += offsets[n - 1]
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.suffixes)
+
+    def __iter__(self):
+        return iter(self.suffixes)
+
+    def count_fitting(self, word_len):
+        """Number of suffixes that keep a ``word_len`` word within ``max_len``."""
+        room = self.max_len - word_len
+        if room <= 0: return 0
+        return self.offsets[room]
+
+    def bounds(self, word_len, min_len=0):
+        """``(start, end)`` of the suffixes that bring a ``word_len`` word to ``min_len``..``max_len``."""
+        end = self.count_fitting(word_len)
+        shortest = min_len - word_len
+        start = self.offsets[min(shortest - 1, self.max_len)] if shortest > 1 else 0
+        return start, max(start, end)
+
+    def count_between(self, word_len, min_len=0):
+        start, end = self.bounds(word_len, min_len)
+        return end - start
+
+    def fitting(self, word_len, min_len=0):
+        """Iterates the suffixes that bring a ``word_len`` word to ``min_len``..``max_len``."""
+        return islice(self.suffixes, *self.bounds(word_len, min_len))
+
+    def append_to(self, word, min_len=0):
+        """Yields ``word + suffix`` for every suffix that fits."""
+        return map(word.__add__, self.fitting(len(word), min_len))
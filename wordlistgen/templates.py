@@ -0,0 +1,136 @@
+"""N-ary combinations from template specs such as ``{name}{keyword}{year}``.
+
+A template is literal text with ``{slot}`` placeholders. Each slot draws
+from one element set of the target (names, pets, keywords, dates...), see
+``SLOTS``. A placeholder may carry a case modifier and be optional:
+``{pet:cap}{special?}{date}`` capitalises the pet name and may leave out
+the special character.
+
+Candidates are enumerated lazily, depth first, with every slot's values
+sorted by length: once a value would push the word past ``max_len`` (given
+the shortest possible rest) the remaining, longer values of that slot are
+skipped, so over-long branches are never built and memory stays at one
+word per slot.
+"""
+import re
+
+SLOTS = {
+    "name": "first name, last name and nicknames",
+    "first": "first name",
+    "last": "last name",
+    "partner": "partner's names and nicknames",
+    "child": "children's names and nicknames",
+    "pet": "pet names",
+    "keyword": "interests and keywords",
+    "place": "city, country and street",
+    "work": "company name and job title",
+    "word": "every textual field (base words, lowercased)",
+    "date": "date variations",
+    "year": "four and two digit years",
+    "number": "lucky numbers (plus 0-99 and common sequences with common numbers on)",
+    "special": "special characters",
+    "sep": "word separators",
+}
+MODIFIERS = {
+    None: lambda value: value,
+    "lower": str.lower,
+    "cap": str.capitalize,
+    "upper": str.upper,
+}
+PLACEHOLDER = re.compile(r"\{(\w+)(?::(\w+))?(\?)?\}")
+
+
+class Template:
+    """A parsed template spec."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.parts = [] # Literal strings and (slot, modifier, optional) tuples
+        pos = 0
+        for match in PLACEHOLDER.finditer(spec):
+            if match.start() > pos: self.parts.append(spec[pos:match.start()])
+            slot, modifier, optional = match.groups()
+            if slot not in SLOTS: raise ValueError(f"Unknown template slot {slot!r} in {spec!r}; expected one of {', '.join(SLOTS)}")
+            if modifier not in MODIFIERS: raise ValueError(f"Unknown modifier {modifier!r} in {spec!r}; expected lower, cap or upper")
+            self.parts.append((slot, modifier, bool(optional)))
+            pos = match.end()
+        if pos < len(spec): self.parts.append(spec[pos:])
+        if any(c in "{}" for part in self.parts if isinstance(part, str) for c in part):
+            raise ValueError(f"Malformed template {spec!r}")
+        if not any(isinstance(part, tuple) for part in self.parts):
+            raise ValueError(f"Template {spec!r} has no {{slot}}")
+
+    def __repr__(self):
+        return f"Template({self.spec!r})"
+
+    @property
+    def slots(self):
+        return [part[0] for part in self.parts if isinstance(part, tuple)]
+
+    def choices(self, values):
+        """Per part, the distinct strings it can take (shortest first).
+
+        ``values`` maps slot names to their element sets.
+        """
+        choices = []
+        for part in self.parts:
+            if isinstance(part, str):
+                choices.append((part,))
+                continue
+            slot, modifier, optional = part
+            options = {MODIFIERS[modifier](v) for v in values.get(slot, ()) if v}
+            if optional: options.add("")
+            choices.append(tuple(sorted(options, key=lambda v: (len(v), v))))
+        return choices
+
+    def expand(self, values, max_len, min_len=0, old_values=None):
+        """Lazily yields every word within ``min_len``..``max_len``.
+
+        With ``old_values`` only words using at least one value missing from
+        ``old_values`` are yielded (the words an edit adds).
+        """
+        choices = self.choices(values)
+        if not all(choices): return
+        # Shortest possible length of parts[i:], for pruning.
+        rest = [0] * (len(choices) + 1)
+        for i in range(len(choices) - 1, -1, -1):
+            rest[i] = rest[i + 1] + len(choices[i][0])
+        if rest[0] > max_len: return
+
+        fresh = None
+        if old_values is not None:
+            old = self.choices(old_values)
+            fresh = [set(c) - set(o) for c, o in zip(choices, old)]
+            can_be_fresh = [False] * (len(choices) + 1)
+            for i in range(len(choices) - 1, -1, -1):
+                can_be_fresh[i] = can_be_fresh[i + 1] or bool(fresh[i])
+
+        def walk(i, prefix, is_fresh):
+            if fresh is not None and not is_fresh and not can_be_fresh[i]: return
+            if i == len(choices):
+                if len(prefix) >= min_len: yield prefix
+                return
+            budget = max_len - len(prefix) - rest[i + 1]
+            for value in choices[i]:
+                if len(value) > budget: break
+                yield from walk(i + 1, prefix + value, is_fresh or (fresh is not None and value in fresh[i]))
+        yield from walk(0, "", False)
+
+    def matcher(self, values, fold=None):
+        """Returns ``match(word)``, yielding the template words that equal
+        ``word`` once both are translated by ``fold`` (exact if None)."""
+        fold = fold or {}
+        folded = [[(v.translate(fold), v) for v in c] for c in self.choices(values)]
+        if not all(folded): return lambda word: iter(())
+
+        def walk(key, i, pos, built):
+            if i == len(folded):
+                if pos == len(key): yield built
+                return
+            for value_key, value in folded[i]:
+                if key.startswith(value_key, pos): yield from walk(key, i + 1, pos + len(value_key), built + value)
+        return lambda word: walk(word.translate(fold), 0, 0, "")
+
+
+def parse_templates(specs):
+    return [Template(spec) for spec in specs or ()]
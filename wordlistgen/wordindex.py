@@ -0,0 +1,308 @@
+"""Compact sorted wordlist files (``.wlx``) with O(log n) lookups.
+
+Layout, integers little-endian:
+
+* header (``HEADER``): magic ``WLX1``, format version, words per block,
+  word count, offset of the index and number of blocks;
+* blocks of ``block_size`` words in UTF-8 byte order. Each word is stored
+  as a varint shared-prefix length with the previous word, a varint length
+  of the rest, then the rest. The first word of a block shares nothing, so
+  every block decodes on its own;
+* the index: one u64 file offset per block.
+
+``WordIndex`` memory-maps a file. A lookup binary-searches the first words
+of the blocks and then scans one block, so it touches O(log n) pages and
+never loads the list. ``union`` and ``difference`` k-way merge any number of
+sorted inputs in one streaming pass. Their output, or any word stream
+(sorted on disk first), is written back with ``write_index`` or exported
+as plain text with ``write_keys``. Keys are UTF-8 ``bytes`` throughout;
+iterating a ``WordIndex`` yields ``str``.
+"""
+import bz2
+import gzip
+import heapq
+import lzma
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from itertools import islice
+
+from .dedup import ExternalSortDeduper
+
+MAGIC = b"WLX1"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQQQ")
+OFFSET = struct.Struct("<Q")
+INDEX_EXTENSION = ".wlx"
+DEFAULT_BLOCK_SIZE = 64 # Words per block; a lookup scans at most one block
+TEXT_OPENERS = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+WRITE_BATCH = 65536
+
+
+def _varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return out
+
+
+def _read_varint(buf, pos):
+    byte = buf[pos]
+    if byte < 0x80: return byte, pos + 1 # Words are short, so this is the usual case
+    n, shift = byte & 0x7F, 7
+    while True:
+        pos += 1
+        byte = buf[pos]
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80: return n, pos + 1
+        shift += 7
+
+
+def _shared_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]: i += 1
+    return i
+
+
+class IndexWriter:
+    """Writes a ``.wlx`` file from keys added in increasing byte order.
+
+    Repeated keys are skipped; a key smaller than the previous one raises
+    ``ValueError``. The file is written to a temp file and moved into place
+    on ``close()``.
+    """
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK_SIZE):
+        if not 1 <= block_size <= 0xFFFF: raise ValueError(f"block_size must be between 1 and 65535, got {block_size}")
+        self.path = path
+        self.block_size = block_size
+        self.count = 0
+        self._offsets = array('Q')
+        self._previous = None
+        fd, self._tmp_path = tempfile.mkstemp(prefix=".wordindex-", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+        self._file = os.fdopen(fd, 'wb', buffering=1 << 20)
+        self._file.write(HEADER.pack(MAGIC, VERSION, block_size, 0, 0, 0))
+        self._pos = HEADER.size
+
+    def add(self, key):
+        previous = self._previous
+        if previous is not None and key <= previous:
+            if key == previous: return
+            raise ValueError(f"Keys must be added in sorted order: {key!r} after {previous!r}")
+        if self.count % self.block_size == 0:
+            self._offsets.append(self._pos)
+            shared = 0
+        else:
+            shared = _shared_prefix(previous, key)
+        data = _varint(shared) + _varint(len(key) - shared) + key[shared:]
+        self._file.write(data)
+        self._pos += len(data)
+        self.count += 1
+        self._previous = key
+
+    def close(self):
+        padding = -self._pos % 8
+        self._file.write(b"\0" * padding)
+        index_offset = self._pos + padding
+        offsets = self._offsets
+        if sys.byteorder != 'little': offsets.byteswap()
+        self._file.write(offsets.tobytes())
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self.block_size, self.count, index_offset, len(offsets)))
+        self._file.close()
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp_path, 0o666 & ~umask) # mkstemp creates files private to the owner
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None: self.close()
+        else: self.abort()
+
+
+class WordIndex:
+    """A memory-mapped ``.wlx`` file: ``word in index``, ``len()`` and sorted iteration."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size: raise ValueError(f"{path} is not a .wlx wordlist")
+        magic, version, self.block_size, self.count, self._index_offset, self._blocks = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC: raise ValueError(f"{path} is not a .wlx wordlist")
+        if version != VERSION: raise ValueError(f"Unsupported .wlx version {version} in {path}")
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, block):
+        return OFFSET.unpack_from(self._map, self._index_offset + 8 * block)[0]
+
+    def _first(self, block):
+        buf = self._map
+        _, pos = _read_varint(buf, self._offset(block))
+        length, pos = _read_varint(buf, pos)
+        return buf[pos:pos + length]
+
+    def _decode(self, block):
+        """Yields the keys of one block."""
+        buf = self._map
+        pos = self._offset(block)
+        key = b""
+        for _ in range(min(self.block_size, self.count - block * self.block_size)):
+            shared, pos = _read_varint(buf, pos)
+            length, pos = _read_varint(buf, pos)
+            key = key[:shared] + buf[pos:pos + length]
+            pos += length
+            yield key
+
+    def __contains__(self, word):
+        key = word.encode('utf-8') if isinstance(word, str) else word
+        lo, hi = 0, self._blocks # Find the last block starting at or before key
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._first(mid) <= key: lo = mid + 1
+            else: hi = mid
+        if lo == 0: return False
+        for entry in self._decode(lo - 1):
+            if entry >= key: return entry == key
+        return False
+
+    def keys(self):
+        """Yields every key (UTF-8 ``bytes``) in sorted order."""
+        for block in range(self._blocks): yield from self._decode(block)
+
+    def __iter__(self):
+        return (key.decode('utf-8') for key in self.keys())
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Building ---
+
+def read_words(path):
+    """Yields the non-empty lines of a text wordlist (``.gz``, ``.xz`` and ``.bz2`` are decompressed)."""
+    opener = TEXT_OPENERS.get(os.path.splitext(path)[1].lower(), open)
+    with opener(path, 'rt', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            word = line.rstrip('\r\n')
+            if word: yield word
+
+
+def _encoded(words):
+    for word in words:
+        yield word.encode('utf-8') if isinstance(word, str) else word
+
+
+def _decoded(words):
+    for word in words:
+        yield word.decode('utf-8') if isinstance(word, bytes) else word
+
+
+def write_index(words, path, block_size=DEFAULT_BLOCK_SIZE, presorted=False, run_size=1_000_000, tmp_dir=None):
+    """Writes ``words`` (``str`` or UTF-8 keys) to a ``.wlx`` file; returns the word count.
+
+    Unless ``presorted``, the words are sorted and deduplicated first in
+    runs of ``run_size`` spilled to ``tmp_dir`` (see ``ExternalSortDeduper``;
+    code point order of ``str`` is UTF-8 byte order).
+    """
+    if not presorted: words = ExternalSortDeduper(run_size, tmp_dir).filter(_decoded(words))
+    with IndexWriter(path, block_size) as writer:
+        for key in _encoded(words): writer.add(key)
+    return writer.count
+
+
+def sorted_keys(path, run_size=1_000_000, tmp_dir=None):
+    """Sorted, distinct keys of a ``.wlx`` file, or of a text wordlist sorted on disk."""
+    if os.path.splitext(path)[1].lower() == INDEX_EXTENSION:
+        with WordIndex(path) as index: yield from index.keys()
+    else:
+        yield from _encoded(ExternalSortDeduper(run_size, tmp_dir).filter(read_words(path)))
+
+
+# --- Streaming set operations ---
+
+def union(*sources):
+    """Yields every key of the sorted ``sources`` once, in sorted order."""
+    previous = None
+    for key in heapq.merge(*(_encoded(source) for source in sources)):
+        if key != previous: yield key
+        previous = key
+
+
+def difference(first, *others):
+    """Yields the keys of sorted ``first`` found in none of the sorted ``others``."""
+    excluded = union(*others)
+    current = next(excluded, None)
+    previous = None
+    for key in _encoded(first):
+        if key == previous: continue
+        previous = key
+        while current is not None and current < key: current = next(excluded, None)
+        if current != key: yield key
+
+
+def write_keys(keys, sink, batch_size=WRITE_BATCH):
+    """Writes keys as plain text lines to a sink (see sinks.py); returns the count."""
+    count = 0
+    keys = iter(keys)
+    while True:
+        batch = list(islice(keys, batch_size))
+        if not batch: return count
+        sink.write_buffer(b"\n".join(batch) + b"\n", len(batch))
+        count += len(batch)
+
+
+class IndexSink:
+    """Sink that spools words to a temp file and writes them to a ``.wlx`` file on close."""
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK_SIZE, run_size=1_000_000, tmp_dir=None):
+        self.path = path
+        self.block_size = block_size
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.lines = self.bytes = 0
+        fd, self._spool_path = tempfile.mkstemp(prefix="wordlist-", suffix=".txt", dir=tmp_dir)
+        self._spool = os.fdopen(fd, 'wb', buffering=1 << 20)
+
+    def write_batch(self, words):
+        if words: self.write_buffer(("\n".join(words) + "\n").encode('utf-8'), len(words))
+
+    def write_buffer(self, data, lines):
+        self._spool.write(data)
+        self.lines += lines
+        self.bytes += len(data)
+
+    def close(self):
+        if self._spool.closed: return
+        self._spool.close()
+        try:
+            write_index(read_words(self._spool_path), self.path, self.block_size, run_size=self.run_size, tmp_dir=self.tmp_dir)
+        finally:
+            os.remove(self._spool_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()